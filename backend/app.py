@@ -1,19 +1,43 @@
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify, request, g
 from flask_cors import CORS
 import os
 import platform
 import psutil
 import redis
 import logging
+import time
 from datetime import datetime
+from async_logging import setup_logging, logging_stats
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# Configure logging: JSON lines written by a background thread, never blocking requests
+setup_logging()
 logger = logging.getLogger(__name__)
+access_logger = logging.getLogger('access')
+ACCESS_LOG = os.environ.get('LOG_ACCESS', '1') == '1'
 
 app = Flask(__name__)
 CORS(app)
 
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def log_request(response):
+    """Access log through the async pipeline (replaces gunicorn's synchronous access log)"""
+    if ACCESS_LOG:
+        duration_ms = (time.perf_counter() - g.get('request_start', time.perf_counter())) * 1000
+        access_logger.info("%s %s %s", request.method, request.path, response.status_code, extra={
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(duration_ms, 2),
+            'remote_addr': request.remote_addr,
+            # Errors are always logged; only successful requests may be sampled out
+            'sample': response.status_code < 400
+        })
+    return response
+
 # Redis connection
 try:
     redis_host = os.environ.get('REDIS_HOST', 'localhost')
@@ -54,7 +78,7 @@ def get_name():
         except Exception as e:
             logger.warning(f"Redis logging failed: {e}")
     
-    logger.info("Name endpoint accessed")
+    logger.info("Name endpoint accessed", extra={'endpoint': '/api/name', 'sample': True})
     return jsonify({
         "name": name,
         "timestamp": datetime.now().isoformat(),
@@ -208,6 +232,7 @@ def get_stats():
         except Exception as e:
             stats["redis_error"] = str(e)
     
+    stats["logging"] = logging_stats()
     stats["timestamp"] = datetime.now().isoformat()
     return jsonify(stats)
 
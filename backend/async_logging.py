@@ -0,0 +1,215 @@
+"""Non-blocking JSON logging for the request path.
+
+Request threads only put records on a bounded queue; a background thread
+formats them as JSON lines and writes them to stdout in batches. When the
+queue is full (e.g. the container log driver applies backpressure) records
+are dropped and counted instead of blocking the request.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+# Attributes every LogRecord has; anything else came from `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+_STOP = object()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including fields passed with `extra=`"""
+
+    def format(self, record):
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "process": record.process,
+            "thread": record.threadName
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and key != 'sample':
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of high-volume INFO records.
+
+    Records logged with extra={'sample': True} at INFO or below are kept
+    with probability `rate`; everything else always passes.
+    """
+
+    def __init__(self, rate=1.0):
+        super().__init__()
+        self.rate = max(0.0, min(1.0, rate))
+        self.sampled_out = 0
+
+    def filter(self, record):
+        if self.rate >= 1.0 or record.levelno > logging.INFO or not getattr(record, 'sample', False):
+            return True
+        if random.random() < self.rate:
+            return True
+        self.sampled_out += 1
+        return False
+
+
+class AsyncQueueHandler(logging.Handler):
+    """Logging handler that never blocks the caller"""
+
+    def __init__(self, stream=None, maxsize=10000, batch_size=256):
+        super().__init__()
+        self.stream = stream or sys.stdout
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.batch_size = batch_size
+        self.dropped = 0
+        self.written = 0
+        self._reported_drops = 0
+        self._drop_lock = threading.Lock()
+        self._closed = False
+        self._writer = threading.Thread(target=self._run, name="async-log-writer", daemon=True)
+        self._writer.start()
+
+    def emit(self, record):
+        if self._closed:
+            with self._drop_lock:
+                self.dropped += 1
+            return
+        try:
+            # Resolve msg % args now: args may be mutated after the call returns
+            record.msg = record.getMessage()
+            record.args = None
+            if record.exc_info:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+                record.exc_info = None
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._drop_lock:
+                self.dropped += 1
+        except Exception:
+            self.handleError(record)
+
+    def _drop_notice(self):
+        """A WARNING line reporting records dropped since the last notice"""
+        with self._drop_lock:
+            dropped = self.dropped - self._reported_drops
+            self._reported_drops = self.dropped
+        if not dropped:
+            return None
+        notice = logging.LogRecord('async_logging', logging.WARNING, __file__, 0,
+                                   "Dropped log records under overload", None, None)
+        notice.dropped = dropped
+        notice.dropped_total = self._reported_drops
+        return self.format(notice)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            record = self.queue.get()
+            batch = [record]
+            # Drain whatever else is waiting so a burst is written with one flush
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            lines = []
+            for record in batch:
+                if record is _STOP:
+                    stopping = True
+                    continue
+                try:
+                    lines.append(self.format(record))
+                except Exception:
+                    self.handleError(record)
+            notice = self._drop_notice()
+            if notice:
+                lines.append(notice)
+
+            if lines:
+                try:
+                    self.stream.write("\n".join(lines) + "\n")
+                    self.stream.flush()
+                    self.written += len(lines)
+                except Exception:
+                    pass
+
+    def stats(self):
+        return {
+            "queued": self.queue.qsize(),
+            "capacity": self.queue.maxsize,
+            "written": self.written,
+            "dropped": self.dropped
+        }
+
+    def close(self, timeout=5.0):
+        """Stop accepting records and flush everything already queued"""
+        if self._closed:
+            return
+        self._closed = True
+        deadline = time.monotonic() + timeout
+        while self._writer.is_alive():
+            try:
+                # Blocking put: the sentinel must not be dropped
+                self.queue.put(_STOP, timeout=0.1)
+                break
+            except queue.Full:
+                if time.monotonic() > deadline:
+                    break
+        self._writer.join(max(0.0, deadline - time.monotonic()))
+        super().close()
+
+
+_handler = None
+_sampler = None
+
+
+def setup_logging(level=None, queue_size=None, sample_rate=None):
+    """Route the root logger through the async JSON pipeline (idempotent)"""
+    global _handler, _sampler
+    if _handler is not None:
+        return _handler
+
+    level = level or os.environ.get('LOG_LEVEL', 'INFO')
+    queue_size = queue_size or int(os.environ.get('LOG_QUEUE_SIZE', 10000))
+    sample_rate = float(os.environ.get('LOG_SAMPLE_RATE', 1.0)) if sample_rate is None else sample_rate
+
+    _handler = AsyncQueueHandler(maxsize=queue_size)
+    _handler.setFormatter(JsonFormatter())
+    _sampler = SamplingFilter(sample_rate)
+    _handler.addFilter(_sampler)
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(_handler)
+    root.setLevel(level)
+
+    atexit.register(shutdown_logging)
+    return _handler
+
+
+def shutdown_logging(timeout=5.0):
+    """Flush queued records; call from gunicorn's worker_exit hook"""
+    if _handler is not None:
+        _handler.close(timeout)
+
+
+def logging_stats():
+    if _handler is None:
+        return {}
+    stats = _handler.stats()
+    stats["sampled_out"] = _sampler.sampled_out
+    stats["sample_rate"] = _sampler.rate
+    return stats
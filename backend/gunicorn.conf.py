@@ -0,0 +1,21 @@
+# Gunicorn configuration for Eemeli's Backend API
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get('GUNICORN_WORKERS', 2))
+timeout = 60
+
+# Access lines are logged by the app through the async JSON logger, so
+# gunicorn's synchronous access log to stdout stays off
+accesslog = None
+errorlog = '-'
+
+# The async log writer thread is started per worker; preloading would start
+# it in the master, and the thread would not survive the fork
+preload_app = False
+
+
+def worker_exit(server, worker):
+    """Flush queued log records before the worker exits"""
+    from async_logging import shutdown_logging
+    shutdown_logging()
@@ -0,0 +1,130 @@
+import json
+import logging
+import os
+import runpy
+import threading
+import time
+
+import pytest
+
+import async_logging
+from async_logging import AsyncQueueHandler, JsonFormatter, SamplingFilter
+
+
+class BlockingStream:
+    """stdout whose writes block until released, like a stalled log driver"""
+
+    def __init__(self, blocked=True):
+        self.released = threading.Event()
+        if not blocked:
+            self.released.set()
+        self.lines = []
+
+    def write(self, text):
+        self.released.wait()
+        self.lines.extend(text.splitlines())
+
+    def flush(self):
+        pass
+
+    def records(self):
+        return [json.loads(line) for line in self.lines]
+
+
+def make_handler(stream, maxsize):
+    handler = AsyncQueueHandler(stream=stream, maxsize=maxsize)
+    handler.setFormatter(JsonFormatter())
+    return handler
+
+
+def make_record(i, level=logging.INFO, sample=False):
+    record = logging.LogRecord('test', level, __file__, 0, "record %d", (i,), None)
+    record.sample = sample
+    return record
+
+
+def test_full_queue_drops_and_counts_without_blocking():
+    stream = BlockingStream()
+    handler = make_handler(stream, maxsize=100)
+
+    started = time.perf_counter()
+    for i in range(10_000):
+        handler.emit(make_record(i))
+    elapsed = time.perf_counter() - started
+
+    # The blocked writer holds at most one batch; the queue holds the rest
+    assert elapsed < 1.0
+    accepted = 10_000 - handler.dropped
+    assert 100 <= accepted <= 100 + handler.batch_size
+
+    stream.released.set()
+    handler.close()
+    records = stream.records()
+    numbers = [int(r['message'].split()[1]) for r in records if r['logger'] == 'test']
+    # Every accepted record is written once, in order
+    assert len(numbers) == accepted
+    assert numbers == sorted(set(numbers))
+    notices = [r for r in records if r['logger'] == 'async_logging']
+    assert sum(n['dropped'] for n in notices) == handler.dropped
+    assert handler.written == len(records)
+
+
+def test_close_flushes_every_queued_record():
+    stream = BlockingStream()
+    handler = make_handler(stream, maxsize=1000)
+    for i in range(500):
+        handler.emit(make_record(i))
+
+    threading.Timer(0.2, stream.released.set).start()
+    handler.close()
+
+    assert [r['message'] for r in stream.records()] == [f"record {i}" for i in range(500)]
+    assert handler.dropped == 0
+
+
+def test_records_after_close_are_dropped():
+    stream = BlockingStream(blocked=False)
+    handler = make_handler(stream, maxsize=10)
+    handler.close()
+
+    handler.emit(make_record(0))
+
+    assert handler.dropped == 1
+    assert stream.lines == []
+
+
+def test_sampling_only_thins_sampleable_info_records(monkeypatch):
+    sampler = SamplingFilter(0.0)
+
+    assert not sampler.filter(make_record(0, sample=True))
+    assert sampler.filter(make_record(1))
+    assert sampler.filter(make_record(2, level=logging.WARNING, sample=True))
+    assert sampler.sampled_out == 1
+
+
+@pytest.fixture
+def root_logger(monkeypatch):
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    monkeypatch.setattr(async_logging, '_handler', None)
+    monkeypatch.setattr(async_logging, '_sampler', None)
+    yield root
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+def test_gunicorn_worker_exit_flushes_the_queue(root_logger, monkeypatch):
+    stream = BlockingStream()
+    monkeypatch.setattr(async_logging.sys, 'stdout', stream)
+    async_logging.setup_logging(level='INFO', queue_size=1000, sample_rate=1.0)
+    for i in range(300):
+        logging.getLogger('test').info("record %d", i)
+
+    threading.Timer(0.2, stream.released.set).start()
+    conf = runpy.run_path(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'gunicorn.conf.py'))
+    conf['worker_exit'](None, None)
+
+    assert [r['message'] for r in stream.records()] == [f"record {i}" for i in range(300)]
@@ -0,0 +1,331 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from flask import Flask, Response, jsonify, request
+from flask_cors import CORS
+from mysql.connector import Error, pooling
+
+import config
+
+app = Flask(__name__)
+CORS(app)
+
+# Rollup buckets; week starts on Monday
+PERIOD_BUCKETS = {
+    'day': "DATE(ts)",
+    'week': "DATE_SUB(DATE(ts), INTERVAL WEEKDAY(ts) DAY)",
+    'month': "DATE_SUB(DATE(ts), INTERVAL DAYOFMONTH(ts) - 1 DAY)"
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_connection():
+    """Connection from a shared pool built on config.DB_CONFIG"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = pooling.MySQLConnectionPool(
+                pool_name='analytics_api',
+                pool_size=config.API_CONFIG['pool_size'],
+                **config.DB_CONFIG
+            )
+    return _pool.get_connection()
+
+
+def query(sql, params=()):
+    connection = get_connection()
+    try:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+    finally:
+        connection.close()
+
+
+class ResponseCache:
+    """LRU cache of serialized responses, keyed by request and data version.
+
+    The data version is the id of the latest pipeline run that changed rows,
+    whatever its status (a failed parallel ingest may still have written some
+    files), so any ingest that changed data (dashboard refresh, CLI, scheduled
+    job) invalidates every entry and no-op runs invalidate nothing.
+    The version is re-read at most every version_check_seconds.
+    """
+
+    def __init__(self, max_entries, ttl, version_check_seconds):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version_check_seconds = version_check_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self._version_checked = 0.0
+
+    def data_version(self):
+        now = time.monotonic()
+        if self._version is None or now - self._version_checked >= self.version_check_seconds:
+            try:
+                rows = query(f"SELECT COALESCE(MAX(id), 0) AS version FROM {config.PIPELINE_CONFIG['runs_table']} "
+                             "WHERE changed_from IS NOT NULL")
+                version = str(rows[0]['version'])
+            except Error:
+                # No run history yet (or table missing): fall back to the cache TTL
+                version = '0'
+            with self._lock:
+                if version != self._version:
+                    self._entries.clear()
+                self._version = version
+                self._version_checked = now
+        return self._version
+
+    def etag(self, key):
+        digest = hashlib.sha1(f"{self.data_version()}|{key}".encode()).hexdigest()
+        return f'"{digest}"'
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                self._entries.pop(key, None)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, body):
+        with self._lock:
+            self._entries[key] = (body, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+cache = ResponseCache(
+    config.API_CONFIG['cache_max_entries'],
+    config.API_CONFIG['cache_ttl'],
+    config.API_CONFIG['version_check_seconds']
+)
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _to_json(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f"Not JSON serializable: {type(value)}")
+
+
+def parse_filters():
+    """start/end (ISO dates or datetimes, end inclusive by day) and area list"""
+    filters = {}
+    for name in ('start', 'end'):
+        value = request.args.get(name)
+        if value:
+            try:
+                filters[name] = datetime.fromisoformat(value)
+            except ValueError:
+                raise BadRequest(f"Invalid {name}: {value!r} (use YYYY-MM-DD or ISO datetime)")
+    # A plain date as end includes that whole day
+    filters['end_inclusive'] = True
+    if 'end' in filters and len(request.args['end']) == 10:
+        filters['end'] += timedelta(days=1)
+        filters['end_inclusive'] = False
+    areas = [a for value in request.args.getlist('area') for a in value.split(',') if a.strip()]
+    filters['areas'] = [a.strip() for a in areas]
+    return filters
+
+
+def where_clause(filters):
+    conditions, params = [], []
+    if 'start' in filters:
+        conditions.append("ts >= %s")
+        params.append(filters['start'])
+    if 'end' in filters:
+        conditions.append("ts <= %s" if filters['end_inclusive'] else "ts < %s")
+        params.append(filters['end'])
+    if filters['areas']:
+        conditions.append(f"area IN ({', '.join(['%s'] * len(filters['areas']))})")
+        params.extend(filters['areas'])
+    return (" WHERE " + " AND ".join(conditions)) if conditions else "", params
+
+
+def default_range(filters):
+    """Give aggregate queries without a start the last default_range_days of data.
+
+    Aggregates scan every row in the range, so an unfiltered request would read
+    the whole table. Returns the effective (start, end) for the response.
+    """
+    end = filters.get('end')
+    if 'start' not in filters:
+        if end is None:
+            end = query("SELECT MAX(ts) AS last_ts FROM electric_prices")[0]['last_ts']
+        if end is not None:
+            filters['start'] = end - timedelta(days=config.API_CONFIG['default_range_days'])
+    return filters.get('start'), end
+
+
+def cached_response(builder):
+    """Serve builder() as JSON with ETag / If-None-Match and a response cache"""
+    key = f"{request.path}?{'&'.join(sorted(f'{k}={v}' for k, v in request.args.items(multi=True)))}"
+    etag = cache.etag(key)
+    headers = {
+        'ETag': etag,
+        'Cache-Control': f"public, max-age={config.API_CONFIG['client_max_age']}"
+    }
+    if etag in [tag.strip() for tag in request.headers.get('If-None-Match', '').split(',')]:
+        return Response(status=304, headers=headers)
+
+    body = cache.get(etag)
+    if body is None:
+        body = json.dumps(builder(), default=_to_json).encode()
+        cache.put(etag, body)
+        headers['X-Cache'] = 'MISS'
+    else:
+        headers['X-Cache'] = 'HIT'
+    return Response(body, mimetype='application/json', headers=headers)
+
+
+@app.route('/')
+def home():
+    """API index"""
+    return jsonify({
+        "message": "Electric prices analytics API",
+        "author": config.APP_INFO['author'],
+        "endpoints": {
+            "/api/prices": "Raw prices: ?start=&end=&area=&limit=",
+            "/api/rollup": "Aggregates: ?period=day|week|month&start=&end=&area= (default: last "
+                           f"{config.API_CONFIG['default_range_days']} days)",
+            "/api/summary": "Summary statistics per area: ?start=&end=&area= (default: last "
+                            f"{config.API_CONFIG['default_range_days']} days)",
+            "/api/areas": "Available areas and date range",
+            "/api/health": "Health check"
+        }
+    })
+
+
+@app.route('/api/prices')
+def get_prices():
+    """Prices for a range, served from the (area, ts, price) covering index"""
+    filters = parse_filters()
+    try:
+        limit = min(int(request.args.get('limit', config.API_CONFIG['max_rows'])), config.API_CONFIG['max_rows'])
+    except ValueError:
+        raise BadRequest("limit must be an integer")
+
+    def build():
+        where, params = where_clause(filters)
+        rows = query(f"SELECT ts, area, price_eur_mwh FROM electric_prices{where} "
+                     f"ORDER BY area, ts LIMIT %s", params + [limit])
+        return {'count': len(rows), 'limit': limit, 'prices': rows}
+
+    return cached_response(build)
+
+
+@app.route('/api/rollup')
+def get_rollup():
+    """avg/min/max/stddev per area and day, week or month"""
+    period = request.args.get('period', 'day')
+    if period not in PERIOD_BUCKETS:
+        raise BadRequest(f"period must be one of: {', '.join(PERIOD_BUCKETS)}")
+    filters = parse_filters()
+
+    def build():
+        start, end = default_range(filters)
+        where, params = where_clause(filters)
+        bucket = PERIOD_BUCKETS[period]
+        rows = query(f"""
+            SELECT area, {bucket} AS period_start, COUNT(*) AS count,
+                   AVG(price_eur_mwh) AS avg, MIN(price_eur_mwh) AS min,
+                   MAX(price_eur_mwh) AS max, STDDEV_SAMP(price_eur_mwh) AS stddev
+            FROM electric_prices{where}
+            GROUP BY area, period_start
+            ORDER BY area, period_start
+        """, params)
+        return {'period': period, 'start': start, 'end': end, 'count': len(rows), 'rollup': rows}
+
+    return cached_response(build)
+
+
+@app.route('/api/summary')
+def get_summary():
+    """Summary statistics per area"""
+    filters = parse_filters()
+
+    def build():
+        start, end = default_range(filters)
+        where, params = where_clause(filters)
+        rows = query(f"""
+            SELECT area, COUNT(*) AS count, MIN(ts) AS first_ts, MAX(ts) AS last_ts,
+                   AVG(price_eur_mwh) AS avg, MIN(price_eur_mwh) AS min,
+                   MAX(price_eur_mwh) AS max, STDDEV_SAMP(price_eur_mwh) AS stddev
+            FROM electric_prices{where}
+            GROUP BY area
+            ORDER BY area
+        """, params)
+        return {'start': start, 'end': end, 'areas': rows}
+
+    return cached_response(build)
+
+
+@app.route('/api/areas')
+def get_areas():
+    """Available areas with their first and last timestamps"""
+    def build():
+        rows = query("SELECT area, MIN(ts) AS first_ts, MAX(ts) AS last_ts "
+                     "FROM electric_prices GROUP BY area ORDER BY area")
+        return {'areas': rows}
+
+    return cached_response(build)
+
+
+@app.route('/api/health')
+def health_check():
+    """Health check endpoint"""
+    health = {
+        "status": "healthy",
+        "service": "analytics-api",
+        "timestamp": datetime.now().isoformat()
+    }
+    try:
+        health["data_version"] = cache.data_version()
+        query("SELECT 1 AS ok")
+        health["database"] = "connected"
+    except Error as e:
+        health["status"] = "degraded"
+        health["database"] = f"disconnected: {e}"
+    return jsonify(health), 200 if health["status"] == "healthy" else 503
+
+
+@app.errorhandler(BadRequest)
+def bad_request(error):
+    return jsonify({"error": "Bad request", "message": str(error)}), 400
+
+
+@app.errorhandler(Error)
+def database_error(error):
+    return jsonify({"error": "Database error", "message": str(error)}), 503
+
+
+@app.errorhandler(404)
+def not_found(error):
+    return jsonify({
+        "error": "Endpoint not found",
+        "available_endpoints": ["/api/prices", "/api/rollup", "/api/summary", "/api/areas", "/api/health"]
+    }), 404
+
+
+if __name__ == '__main__':
+    print(f"🚀 Starting analytics API on port {config.API_CONFIG['port']}")
+    app.run(host=config.API_CONFIG['host'], port=config.API_CONFIG['port'])
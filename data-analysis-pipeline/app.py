@@ -6,7 +6,10 @@ from datetime import datetime, timedelta
 import mysql.connector
 from mysql.connector import Error
 import numpy as np
+import time
 from data_processor import DataProcessor
+from refresh_jobs import RefreshJobRunner
+from rolling_analytics import RollingAnalytics
 import config
 
 # Configure Streamlit page
@@ -47,27 +50,89 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Default dashboard window; hourly multi-zone history is too large to load whole
+DEFAULT_RANGE_DAYS = 90
+
+@st.cache_data(ttl=config.REFRESH_CONFIG['cache_ttl'], max_entries=32, show_spinner=False)
+def load_cached_prices(data_version, start, end, areas):
+    """Cached price query; a new data_version (after a refresh) misses the cache"""
+    return DataProcessor().fetch_prices(start, end, areas)
+
+@st.cache_data(ttl=config.REFRESH_CONFIG['cache_ttl'], max_entries=32, show_spinner=False)
+def load_cached_rolling(data_version, start, end, areas):
+    """Precomputed rolling series (extended after each ingest), never recomputed here"""
+    return RollingAnalytics(DataProcessor()).fetch_metrics(start, end, areas)
+
+@st.cache_data(ttl=config.REFRESH_CONFIG['cache_ttl'], show_spinner=False)
+def load_cached_bounds(data_version):
+    return DataProcessor().get_data_bounds()
+
+@st.cache_data(ttl=config.REFRESH_CONFIG['cache_ttl'], show_spinner=False)
+def load_cached_stats(data_version):
+    """Full-table COUNT/AVG, only re-run after a refresh; raises Error (not cached)"""
+    connection = mysql.connector.connect(**config.DB_CONFIG)
+    try:
+        cursor = connection.cursor()
+        
+        # Get table info
+        cursor.execute("SELECT COUNT(*) FROM electric_prices")
+        total_records = cursor.fetchone()[0]
+        
+        cursor.execute("SELECT MIN(ts), MAX(ts) FROM electric_prices")
+        date_range = cursor.fetchone()
+        
+        cursor.execute("SELECT AVG(price_eur_mwh) FROM electric_prices")
+        avg_price = cursor.fetchone()[0]
+        
+        return {
+            'total_records': total_records,
+            'date_range': date_range,
+            'avg_price': avg_price
+        }
+    finally:
+        connection.close()
+
+@st.cache_data(ttl=config.REFRESH_CONFIG['cache_ttl'], show_spinner=False)
+def load_cached_runs(runs_version):
+    """Pipeline run history, re-read when a refresh on this server finishes"""
+    return DataProcessor().get_pipeline_runs()
+
+@st.cache_resource
+def get_refresh_runner():
+    """One background refresh runner shared by every session of this server"""
+    runner = RefreshJobRunner()
+    runner.on_complete(lambda job: (load_cached_prices.clear(), load_cached_rolling.clear(),
+                                    load_cached_bounds.clear(), load_cached_stats.clear()))
+    # Scheduled refreshes run in the standalone `python3 refresh_jobs.py` process
+    return runner
+
 class ElectricPriceAnalyzer:
     def __init__(self):
         self.data_processor = DataProcessor()
+        self.refresh_runner = get_refresh_runner()
         
-    def load_data(self):
-        """Load data from MySQL database"""
+    def load_data(self, start=None, end=None, areas=None):
+        """Load data from MySQL database for the selected range and areas"""
         try:
-            connection = mysql.connector.connect(**config.DB_CONFIG)
-            if connection.is_connected():
-                query = """
-                SELECT date, price_eur_mwh, area, timestamp 
-                FROM electric_prices 
-                ORDER BY date DESC
-                """
-                df = pd.read_sql(query, connection)
-                connection.close()
-                return df
+            df = load_cached_prices(self.refresh_runner.data_version, start, end,
+                                    tuple(areas) if areas else None)
+            return df.rename(columns={'ts': 'date'})
         except Error as e:
             st.error(f"Database connection error: {e}")
             # Fallback to CSV if database not available
             return self.load_csv_fallback()
+    
+    def load_rolling(self, start=None, end=None, areas=None):
+        """Load precomputed rolling analytics; empty if not available"""
+        try:
+            return load_cached_rolling(self.refresh_runner.data_version, start, end,
+                                       tuple(areas) if areas else None)
+        except Error:
+            return pd.DataFrame()
+    
+    def get_data_bounds(self):
+        """First/last timestamp and areas, cached until the next refresh"""
+        return load_cached_bounds(self.refresh_runner.data_version)
         
     def load_csv_fallback(self):
         """Fallback to load CSV if database not available"""
@@ -79,31 +144,16 @@ class ElectricPriceAnalyzer:
             return pd.DataFrame()
     
     def get_database_stats(self):
-        """Get database statistics"""
+        """Get database statistics, cached until the next refresh"""
         try:
-            connection = mysql.connector.connect(**config.DB_CONFIG)
-            if connection.is_connected():
-                cursor = connection.cursor()
-                
-                # Get table info
-                cursor.execute("SELECT COUNT(*) FROM electric_prices")
-                total_records = cursor.fetchone()[0]
-                
-                cursor.execute("SELECT MIN(date), MAX(date) FROM electric_prices")
-                date_range = cursor.fetchone()
-                
-                cursor.execute("SELECT AVG(price_eur_mwh) FROM electric_prices")
-                avg_price = cursor.fetchone()[0]
-                
-                connection.close()
-                
-                return {
-                    'total_records': total_records,
-                    'date_range': date_range,
-                    'avg_price': avg_price
-                }
+            return load_cached_stats(self.refresh_runner.data_version)
         except Error:
             return None
+    
+    def get_pipeline_runs(self):
+        """Recent pipeline runs, cached until a refresh on this server finishes"""
+        finished = [job.id for job in self.refresh_runner.jobs() if not job.is_active]
+        return load_cached_runs((self.refresh_runner.data_version, max(finished, default=0)))
 
 def main():
     # Header
@@ -117,9 +167,46 @@ def main():
     st.sidebar.title("📊 Dashboard Controls")
     st.sidebar.markdown("---")
     
+    # Sidebar filters
+    st.sidebar.subheader("🔍 Data Filters")
+    
+    # Range and area filters are applied in MySQL when the database is available
+    bounds = analyzer.get_data_bounds()
+    start_date = end_date = selected_areas = None
+    if bounds:
+        min_date = bounds['min_ts'].date()
+        max_date = bounds['max_ts'].date()
+        default_start = max(min_date, max_date - timedelta(days=DEFAULT_RANGE_DAYS))
+        
+        date_range = st.sidebar.date_input(
+            "Select Date Range",
+            value=(default_start, max_date),
+            min_value=min_date,
+            max_value=max_date
+        )
+        
+        # While only one end of the range is picked, keep the default window
+        # rather than loading the whole history
+        start_date, end_date = default_start, max_date
+        if len(date_range) == 2:
+            start_date, end_date = date_range
+        else:
+            st.sidebar.caption(f"Pick an end date; showing the last {DEFAULT_RANGE_DAYS} days meanwhile.")
+        
+        if len(bounds['areas']) > 1:
+            selected_areas = st.sidebar.multiselect(
+                "Bidding Zones",
+                options=bounds['areas'],
+                default=bounds['areas'][:1]
+            )
+            # An empty selection means the default zone, never every zone
+            if not selected_areas:
+                selected_areas = bounds['areas'][:1]
+                st.sidebar.caption(f"No zone selected; showing {selected_areas[0]}.")
+    
     # Load data
     with st.spinner("Loading data from MySQL database..."):
-        df = analyzer.load_data()
+        df = analyzer.load_data(start_date, end_date, selected_areas)
     
     if df.empty:
         st.error("No data available. Please check database connection or upload Electric_prices.csv file.")
@@ -131,10 +218,8 @@ def main():
         df = df.dropna(subset=['date'])
         df = df.sort_values('date')
     
-    # Sidebar filters
-    st.sidebar.subheader("🔍 Data Filters")
-    
-    if not df.empty and 'date' in df.columns:
+    # CSV fallback: filter the date range in pandas
+    if bounds is None and not df.empty and 'date' in df.columns:
         min_date = df['date'].min().date()
         max_date = df['date'].max().date()
         
@@ -198,6 +283,7 @@ def main():
                     df, 
                     x='date', 
                     y='price_eur_mwh',
+                    color='area' if 'area' in df.columns and df['area'].nunique() > 1 else None,
                     title="Electric Prices Trend",
                     labels={'date': 'Date', 'price_eur_mwh': 'Price (EUR/MWh)'}
                 )
@@ -214,6 +300,48 @@ def main():
                     labels={'price_eur_mwh': 'Price (EUR/MWh)', 'count': 'Frequency'}
                 )
                 st.plotly_chart(fig_hist, use_container_width=True)
+                
+                # Rolling analytics (precomputed at ingest time)
+                st.subheader("📉 Rolling Analytics")
+                rolling_df = analyzer.load_rolling(start_date, end_date, selected_areas)
+                
+                if rolling_df.empty:
+                    st.info("No rolling analytics yet. They are computed on the next data refresh.")
+                else:
+                    rolling_areas = sorted(rolling_df['area'].unique())
+                    rolling_area = rolling_areas[0]
+                    if len(rolling_areas) > 1:
+                        rolling_area = st.selectbox("Area", rolling_areas, key='rolling_area')
+                    area_df = rolling_df[rolling_df['area'] == rolling_area]
+                    short_window, long_window = config.ROLLING_CONFIG['windows'][:2]
+                    
+                    fig_rolling = go.Figure()
+                    fig_rolling.add_trace(go.Scatter(x=area_df['ts'], y=area_df['price_eur_mwh'], name='Price',
+                                                     line=dict(width=1, color='lightgray')))
+                    fig_rolling.add_trace(go.Scatter(x=area_df['ts'], y=area_df[f'mean_{short_window}'],
+                                                     name=f'Mean ({short_window} points)'))
+                    fig_rolling.add_trace(go.Scatter(x=area_df['ts'], y=area_df[f'mean_{long_window}'],
+                                                     name=f'Mean ({long_window} points)'))
+                    fig_rolling.add_trace(go.Scatter(x=area_df['ts'], y=area_df['ewma'],
+                                                     name=f"EWMA (span {config.ROLLING_CONFIG['ewma_span']} points)"))
+                    spikes = area_df[area_df['is_spike']]
+                    fig_rolling.add_trace(go.Scatter(x=spikes['ts'], y=spikes['price_eur_mwh'], mode='markers',
+                                                     name='Spike', marker=dict(color='red', size=8)))
+                    fig_rolling.update_layout(title=f"Moving Averages and Spikes - {rolling_area}",
+                                              yaxis_title='Price (EUR/MWh)', height=450)
+                    st.plotly_chart(fig_rolling, use_container_width=True)
+                    
+                    fig_volatility = px.line(
+                        area_df.rename(columns={f'std_{short_window}': f'{short_window} points',
+                                                f'std_{long_window}': f'{long_window} points'}),
+                        x='ts',
+                        y=[f'{short_window} points', f'{long_window} points'],
+                        title="Rolling Volatility (Standard Deviation)",
+                        labels={'ts': 'Date', 'value': 'Std Dev (EUR/MWh)', 'variable': 'Window'}
+                    )
+                    st.plotly_chart(fig_volatility, use_container_width=True)
+                    st.caption(f"{int(spikes.shape[0])} spikes (> {config.ROLLING_CONFIG['spike_threshold']}σ "
+                               f"from the previous {config.ROLLING_CONFIG['spike_window']} points)")
         
         with tab2:
             st.subheader("Statistical Analysis")
@@ -295,17 +423,37 @@ def main():
             
             with col1:
                 st.markdown("### 🔄 Data Pipeline Status")
+                runner = analyzer.refresh_runner
                 if st.button("🔄 Refresh Data from Source"):
-                    with st.spinner("Processing data..."):
-                        success = analyzer.data_processor.process_electric_prices()
-                        if success:
-                            st.success("✅ Data refreshed successfully!")
-                            st.experimental_rerun()
-                        else:
-                            st.error("❌ Data refresh failed.")
+                    running_job = runner.current_job
+                    job = runner.submit()
+                    # Only the session that started or joined a refresh polls for its progress
+                    st.session_state['refresh_job_id'] = job.id
+                    if job is running_job:
+                        st.info(f"Joined refresh #{job.id} that is already in progress.")
+                
+                job = runner.current_job
+                if job:
+                    snapshot = job.snapshot()
+                    if job.is_active:
+                        st.progress(snapshot['fraction'], text=f"Refresh #{snapshot['id']}: {snapshot['message']}")
+                    elif snapshot['status'] == 'success':
+                        st.success(f"✅ Refresh #{snapshot['id']} completed at {snapshot['finished_at']:%H:%M:%S}")
+                    elif snapshot['status'] == 'skipped':
+                        st.info(f"ℹ️ Refresh #{snapshot['id']}: {snapshot['message']}")
+                    else:
+                        st.error(f"❌ Refresh #{snapshot['id']} failed: {snapshot['error']}")
+                    
+                    with st.expander("Refresh progress log"):
+                        st.text("\n".join(f"{at:%H:%M:%S}  {message}" for at, _, message in snapshot['events']))
+                
+                if config.REFRESH_CONFIG['schedule']:
+                    st.caption(f"🕒 Scheduled refreshes: `{config.REFRESH_CONFIG['schedule']}` "
+                               "(run by `python3 refresh_jobs.py`; the dashboard picks them up "
+                               f"within {config.REFRESH_CONFIG['cache_ttl']} s)")
                 
                 st.markdown("### 📊 Pipeline Info")
-                st.info("**Source:** Electric_prices.csv")
+                st.info(f"**Source:** {analyzer.data_processor.data_file}")
                 st.info("**Processing:** Pandas + MySQL")
                 st.info("**Visualization:** Plotly + Streamlit")
             
@@ -320,6 +468,37 @@ def main():
                 st.metric("Data Quality Score", f"{quality_score:.1f}%")
                 st.metric("Missing Values", f"{missing_values}")
                 st.metric("Complete Records", f"{total_rows - missing_values}")
+            
+            # Pipeline run history
+            st.markdown("### ⏱️ Pipeline Run History")
+            runs = analyzer.get_pipeline_runs()
+            
+            if runs:
+                stages_df = pd.DataFrame([
+                    dict(stage, run=f"#{run['id']} {run['started_at']:%Y-%m-%d %H:%M}")
+                    for run in runs
+                    for stage in run['stages']
+                ])
+                
+                if not stages_df.empty:
+                    stages_df['started_at'] = pd.to_datetime(stages_df['started_at'])
+                    stages_df['finished_at'] = pd.to_datetime(stages_df['finished_at'])
+                    fig_timeline = px.timeline(
+                        stages_df,
+                        x_start='started_at',
+                        x_end='finished_at',
+                        y='run',
+                        color='stage',
+                        hover_data=['seconds', 'rows_in', 'rows_out', 'rows_per_sec', 'peak_rss_mb'],
+                        title="Stage Timeline (Recent Runs)"
+                    )
+                    fig_timeline.update_yaxes(autorange="reversed")
+                    st.plotly_chart(fig_timeline, use_container_width=True)
+                
+                runs_df = pd.DataFrame(runs).drop(columns=['stages'])
+                st.dataframe(runs_df, use_container_width=True)
+            else:
+                st.info("No pipeline runs recorded yet.")
     
     # Footer
     st.markdown("---")
@@ -335,6 +514,14 @@ def main():
         </p>
     </div>
     """, unsafe_allow_html=True)
+    
+    # Poll the background refresh this session started or joined: the page is
+    # fully rendered, so only this short sleep waits before the next rerun.
+    # Other sessions (and scheduled refreshes) don't trigger reruns.
+    job = analyzer.refresh_runner.current_job
+    if job and job.is_active and st.session_state.get('refresh_job_id') == job.id:
+        time.sleep(config.REFRESH_CONFIG['poll_seconds'])
+        st.rerun()
 
 if __name__ == "__main__":
     main()
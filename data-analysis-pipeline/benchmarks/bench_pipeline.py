@@ -0,0 +1,187 @@
+"""Benchmark the data pipeline and dashboard paths at increasing data volumes.
+
+Runs against a disposable MySQL (see benchmarks/docker-compose.yml) and writes
+machine-readable results as JSON:
+
+    python3 benchmarks/bench_pipeline.py --sizes 10000 100000 1000000 --output bench_results.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+from data_processor import DataProcessor  # noqa: E402
+from rolling_analytics import RollingAnalytics  # noqa: E402
+from synthetic_data import NORDIC_ZONES, fit_freq, write_synthetic_csv  # noqa: E402
+
+DEFAULT_SIZES = [10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Electric prices pipeline benchmarks")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="row counts to benchmark (default: 10^4 .. 10^7)")
+    parser.add_argument('--output', default='bench_results.json', help="JSON results file")
+    parser.add_argument('--repeat', type=int, default=1, help="runs per size; each is reported")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--years', type=float, default=3.0,
+                        help="longest time span of the generated data (default: 3)")
+    parser.add_argument('--db-host', default=os.getenv('BENCH_DB_HOST', '127.0.0.1'))
+    parser.add_argument('--db-port', type=int, default=int(os.getenv('BENCH_DB_PORT', 3307)))
+    parser.add_argument('--db-name', default=os.getenv('BENCH_DB_NAME', 'electric_bench'))
+    parser.add_argument('--db-user', default=os.getenv('BENCH_DB_USER', 'bench'))
+    parser.add_argument('--db-password', default=os.getenv('BENCH_DB_PASSWORD', 'bench'))
+    parser.add_argument('--allow-shared-db', action='store_true',
+                        help="allow running against the application database "
+                             "(DROPS electric_prices and the rolling analytics tables!)")
+    return parser.parse_args()
+
+
+def timed(results, size, run, stage, rows_in, fn, *args):
+    """Run fn(*args), append a result record and return fn's return value"""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        value = fn(*args)
+    seconds = time.perf_counter() - start
+
+    rows_out = len(value) if isinstance(value, pd.DataFrame) else rows_in
+    results.append({
+        'size': size,
+        'run': run,
+        'stage': stage,
+        'seconds': round(seconds, 6),
+        'rows_in': rows_in,
+        'rows_out': rows_out,
+        'rows_per_sec': round(rows_in / seconds, 1) if seconds > 0 else None
+    })
+    print(f"  {stage:<22} {seconds:>10.3f}s  {rows_in:>12,} rows")
+    return value
+
+
+def reset_table(processor):
+    """Drop electric_prices and the rolling analytics tables"""
+    connection = processor.connect_database()
+    if connection is None:
+        raise SystemExit("❌ Cannot connect to the benchmark database")
+    try:
+        cursor = connection.cursor()
+        for table in ('electric_prices', config.ROLLING_CONFIG['metrics_table'], config.ROLLING_CONFIG['state_table']):
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+    finally:
+        connection.close()
+
+
+def database_stats(processor):
+    """Same queries as ElectricPriceAnalyzer.get_database_stats() in app.py"""
+    connection = processor.connect_database()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT COUNT(*) FROM electric_prices")
+        cursor.fetchone()
+        cursor.execute("SELECT MIN(ts), MAX(ts) FROM electric_prices")
+        cursor.fetchone()
+        cursor.execute("SELECT AVG(price_eur_mwh) FROM electric_prices")
+        cursor.fetchone()
+    finally:
+        connection.close()
+
+
+def dashboard_aggregates(df):
+    """Mirror of the per-rerun aggregations done in app.py's main()"""
+    df = df.rename(columns={'ts': 'date'}).sort_values('date')
+    df['price_eur_mwh'].describe()
+    df['month'] = df['date'].dt.strftime('%Y-%m')
+    monthly = df.groupby('month')['price_eur_mwh'].mean().reset_index()
+    df.isnull().sum().sum()
+    return monthly
+
+
+def run_size(processor, size, run, seed, freq, years, workdir, results):
+    csv_path = os.path.join(workdir, f'prices_{size}.csv')
+    timed(results, size, run, 'generate_csv', size, write_synthetic_csv, csv_path, size, '2020-01-01', None, freq,
+          1_000_000, seed, years)
+    processor.data_file = csv_path
+
+    # process_electric_prices() stages for a single CSV file
+    # (the parallel directory/glob path is not benchmarked here)
+    reset_table(processor)
+    if not timed(results, size, run, 'migrate_legacy_table', 0, processor.migrate_legacy_table):
+        raise SystemExit("❌ migrate_legacy_table failed")
+    if not timed(results, size, run, 'create_table', 0, processor.create_table):
+        raise SystemExit("❌ create_table failed")
+    raw = timed(results, size, run, 'load_csv_data', size, processor.load_csv_data)
+    cleaned = timed(results, size, run, 'clean_data', len(raw), processor.clean_data, raw)
+    if not timed(results, size, run, 'insert_data_to_db', len(cleaned), processor.insert_data_to_db, cleaned):
+        raise SystemExit("❌ insert_data_to_db failed")
+    rows = len(cleaned)
+    del raw, cleaned
+    # Full build of the rolling series, as on the first ingest
+    if timed(results, size, run, 'rolling_analytics', rows, RollingAnalytics(processor).update) is None:
+        raise SystemExit("❌ rolling_analytics failed")
+
+    # Dashboard load and aggregate paths
+    timed(results, size, run, 'get_data_bounds', size, processor.get_data_bounds)
+    timed(results, size, run, 'get_database_stats', size, database_stats, processor)
+    df = timed(results, size, run, 'fetch_prices', size, processor.fetch_prices)
+    timed(results, size, run, 'dashboard_aggregates', len(df), dashboard_aggregates, df)
+    os.remove(csv_path)
+
+
+def main():
+    args = parse_args()
+    if args.db_name == config.DB_CONFIG['database'] and not args.allow_shared_db:
+        raise SystemExit(f"❌ Refusing to benchmark against '{args.db_name}'; use --allow-shared-db to override")
+
+    config.DB_CONFIG.update({
+        'host': args.db_host,
+        'port': args.db_port,
+        'database': args.db_name,
+        'user': args.db_user,
+        'password': args.db_password
+    })
+    processor = DataProcessor()
+    results = []
+    started_at = datetime.now().isoformat()
+    frequencies = {size: fit_freq(size, years=args.years) for size in args.sizes}
+
+    with tempfile.TemporaryDirectory(prefix='electric-bench-') as workdir:
+        for size in args.sizes:
+            for run in range(1, args.repeat + 1):
+                print(f"📊 {size:,} rows at {frequencies[size]} resolution (run {run}/{args.repeat})")
+                run_size(processor, size, run, args.seed, frequencies[size], args.years, workdir, results)
+        reset_table(processor)
+
+    report = {
+        'meta': {
+            'started_at': started_at,
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'cpu_count': os.cpu_count(),
+            'platform': platform.platform(),
+            'db_host': f"{args.db_host}:{args.db_port}",
+            'insert_batch_size': config.DATA_CONFIG['insert_batch_size'],
+            'zones': len(NORDIC_ZONES),
+            'frequencies': {str(size): freq for size, freq in frequencies.items()}
+        },
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -25,8 +25,78 @@ STREAMLIT_CONFIG = {
 DATA_CONFIG = {
     'csv_file': 'data/Electric_prices.csv',
     'table_name': 'electric_prices',
-    'date_column': 'date',
-    'price_column': 'price_eur_mwh'
+    'date_column': 'ts',
+    'price_column': 'price_eur_mwh',
+    'default_area': 'Finland',
+    'insert_batch_size': int(os.getenv('INSERT_BATCH_SIZE', 10000))
+}
+
+# Partitioning Configuration
+# electric_prices is RANGE COLUMNS partitioned by month on ts. Rows older than
+# first_month land in the p_before catch-all partition.
+PARTITION_CONFIG = {
+    'first_month': os.getenv('PARTITION_FIRST_MONTH', '2020-01'),
+    'months_ahead': int(os.getenv('PARTITION_MONTHS_AHEAD', 3)),
+    'archive_prefix': 'electric_prices_archive_',
+    'legacy_table': 'electric_prices_legacy',
+    # Built here during migrate_legacy_table(), then swapped in
+    'migration_table': 'electric_prices_migrating'
+}
+
+# Multi-file Ingestion Configuration
+# Used when DataProcessor is given a directory or glob instead of a single CSV
+INGEST_CONFIG = {
+    'parse_workers': int(os.getenv('INGEST_PARSE_WORKERS', os.cpu_count() or 1)),
+    'max_writers': int(os.getenv('INGEST_MAX_WRITERS', 2)),
+    'max_retries': int(os.getenv('INGEST_MAX_RETRIES', 2)),
+    'file_pattern': '*.csv',
+    'manifest_table': 'ingest_manifest'
+}
+
+# Pipeline Instrumentation Configuration
+PIPELINE_CONFIG = {
+    'runs_table': 'pipeline_runs',
+    'profile': os.getenv('PIPELINE_PROFILE', '0') == '1',
+    'profile_dir': os.getenv('PIPELINE_PROFILE_DIR', 'logs/profiles'),
+    'history_limit': 20
+}
+
+# Background Refresh Configuration
+# schedule is a 5-field cron expression (e.g. '0 * * * *'); empty disables it
+REFRESH_CONFIG = {
+    'schedule': os.getenv('REFRESH_SCHEDULE', ''),
+    'lock_name': 'electric_prices_refresh',
+    'history': 10,
+    'poll_seconds': 2,
+    'cache_ttl': int(os.getenv('DASHBOARD_CACHE_TTL', 300))
+}
+
+# Rolling Analytics Configuration
+# Windows are in rows, i.e. hours for an hourly series (24 h and 7 days)
+ROLLING_CONFIG = {
+    # Window sizes are row counts, not durations: 24 points is a day of hourly
+    # prices but only 6 hours at 15-minute resolution
+    'windows': [24, 168],
+    'ewma_span': 24,
+    'spike_window': 168,
+    'spike_threshold': 3.0,
+    'chunk_rows': 200000,
+    'metrics_table': 'rolling_metrics',
+    'state_table': 'rolling_state'
+}
+
+# Analytics API Configuration
+API_CONFIG = {
+    'host': '0.0.0.0',
+    'port': int(os.getenv('API_PORT', 8502)),
+    'pool_size': int(os.getenv('API_POOL_SIZE', 4)),
+    'max_rows': int(os.getenv('API_MAX_ROWS', 50000)),
+    # Aggregates without a start cover this many days up to end (or the latest data)
+    'default_range_days': int(os.getenv('API_DEFAULT_RANGE_DAYS', 90)),
+    'cache_ttl': int(os.getenv('API_CACHE_TTL', 600)),
+    'cache_max_entries': 256,
+    'version_check_seconds': 5,
+    'client_max_age': 60
 }
 
 # Application Information
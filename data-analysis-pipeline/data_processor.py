@@ -2,12 +2,30 @@ import pandas as pd
 import mysql.connector
 from mysql.connector import Error
 import os
+import json
 from datetime import datetime
 import config
+from instrumentation import PipelineRun, create_runs_table, save_run
 
 class DataProcessor:
-    def __init__(self):
-        self.data_file = 'data/Electric_prices.csv'
+    def __init__(self, data_file=None):
+        # A single CSV file, or a directory / glob pattern of CSV files
+        self.data_file = data_file or config.DATA_CONFIG['csv_file']
+        # Optional progress hook: progress_callback(stage, message, fraction_of_stage)
+        self.progress_callback = None
+    
+    def report_progress(self, stage, message, fraction=None):
+        """Forward a progress update to progress_callback, if one is set"""
+        if self.progress_callback:
+            self.progress_callback(stage, message, fraction)
+    
+    def _on_stage(self, metrics, event):
+        if event == 'start':
+            self.report_progress(metrics.name, f"{metrics.name} started", 0.0)
+        else:
+            status = "done" if metrics.ok else "failed"
+            self.report_progress(metrics.name, f"{metrics.name} {status} in {metrics.seconds:.1f}s "
+                                 f"({metrics.rows_out:,} rows)", 1.0)
         
     def connect_database(self):
         """Connect to MySQL database"""
@@ -18,21 +36,33 @@ class DataProcessor:
             print(f"Database connection error: {e}")
             return None
     
-    def create_table(self):
-        """Create electric_prices table if it doesn't exist"""
+    def create_table(self, table='electric_prices'):
+        """Create the month-partitioned electric_prices table if it doesn't exist"""
         connection = self.connect_database()
         if connection:
             try:
                 cursor = connection.cursor()
-                create_table_query = """
-                CREATE TABLE IF NOT EXISTS electric_prices (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    date DATE NOT NULL,
+                first_month = pd.Timestamp(config.PARTITION_CONFIG['first_month']).to_period('M')
+                last_month = (pd.Timestamp.now().to_period('M')
+                              + config.PARTITION_CONFIG['months_ahead'])
+                partitions = [f"PARTITION p_before VALUES LESS THAN ('{first_month.start_time:%Y-%m-%d}')"]
+                partitions += [self._month_partition(month)
+                               for month in pd.period_range(first_month, last_month, freq='M')]
+                partitions.append("PARTITION pmax VALUES LESS THAN (MAXVALUE)")
+                
+                # Prices may go negative in the Nordic spot market, so no CHECK >= 0.
+                # (ts, area) is the natural key; idx_area_ts_price covers dashboard range queries.
+                create_table_query = f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    ts DATETIME NOT NULL,
+                    area VARCHAR(50) NOT NULL DEFAULT 'Finland',
                     price_eur_mwh DECIMAL(10,2) NOT NULL,
-                    area VARCHAR(50),
-                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    INDEX idx_date (date),
-                    INDEX idx_price (price_eur_mwh)
+                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                    PRIMARY KEY (ts, area),
+                    INDEX idx_area_ts_price (area, ts, price_eur_mwh)
+                ) ENGINE=InnoDB
+                PARTITION BY RANGE COLUMNS (ts) (
+                    {', '.join(partitions)}
                 )
                 """
                 cursor.execute(create_table_query)
@@ -46,6 +76,181 @@ class DataProcessor:
                 connection.close()
         return False
     
+    @staticmethod
+    def _month_partition(month):
+        """Partition clause for one calendar month (a pandas Period)"""
+        upper = (month + 1).start_time
+        return f"PARTITION p{month.start_time:%Y%m} VALUES LESS THAN ('{upper:%Y-%m-%d}')"
+    
+    def get_partitions(self, cursor, table='electric_prices'):
+        """Return [(name, upper_bound)] for electric_prices; upper_bound is None for MAXVALUE"""
+        cursor.execute("""
+            SELECT PARTITION_NAME, PARTITION_DESCRIPTION
+            FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+            ORDER BY PARTITION_ORDINAL_POSITION
+        """, (table,))
+        partitions = []
+        for name, description in cursor.fetchall():
+            if name is None:
+                continue
+            if description == 'MAXVALUE':
+                partitions.append((name, None))
+            else:
+                partitions.append((name, pd.Timestamp(description.strip("'"))))
+        return partitions
+    
+    def ensure_partitions(self, through_ts, table='electric_prices'):
+        """Split pmax so that monthly partitions exist up to through_ts (+ months_ahead)"""
+        connection = self.connect_database()
+        if connection:
+            try:
+                cursor = connection.cursor()
+                bounds = [upper for _, upper in self.get_partitions(cursor, table) if upper is not None]
+                if not bounds:
+                    print(f"❌ {table} is not partitioned; run migrate_legacy_table() first")
+                    return False
+                
+                next_month = bounds[-1].to_period('M')
+                last_month = (max(pd.Timestamp(through_ts), pd.Timestamp.now()).to_period('M')
+                              + config.PARTITION_CONFIG['months_ahead'])
+                if next_month > last_month:
+                    return True
+                
+                new_partitions = [self._month_partition(month)
+                                  for month in pd.period_range(next_month, last_month, freq='M')]
+                new_partitions.append("PARTITION pmax VALUES LESS THAN (MAXVALUE)")
+                cursor.execute(
+                    f"ALTER TABLE {table} REORGANIZE PARTITION pmax INTO ({', '.join(new_partitions)})"
+                )
+                print(f"✅ Added {len(new_partitions) - 1} monthly partitions")
+                return True
+            except Error as e:
+                print(f"❌ Error adding partitions: {e}")
+                return False
+            finally:
+                connection.close()
+        return False
+    
+    def archive_partitions(self, before):
+        """Move whole months older than `before` out of electric_prices.
+        
+        Each partition is swapped into its own plain table with EXCHANGE PARTITION
+        (a metadata-only operation) and then dropped, so archiving does not touch
+        the live rows. The archive tables can be dumped and dropped afterwards.
+        """
+        cutoff = pd.Timestamp(before)
+        connection = self.connect_database()
+        archived = []
+        if connection:
+            try:
+                cursor = connection.cursor()
+                for name, upper in self.get_partitions(cursor):
+                    if upper is None or upper > cutoff:
+                        continue
+                    archive_table = f"{config.PARTITION_CONFIG['archive_prefix']}{name.lstrip('p')}"
+                    # Each step is checked so an interrupted archive run can be retried
+                    cursor.execute(f"CREATE TABLE IF NOT EXISTS {archive_table} LIKE electric_prices")
+                    if self.get_partitions(cursor, archive_table):
+                        cursor.execute(f"ALTER TABLE {archive_table} REMOVE PARTITIONING")
+                    
+                    cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {archive_table})")
+                    archive_has_rows = cursor.fetchone()[0]
+                    cursor.execute(f"SELECT EXISTS (SELECT 1 FROM electric_prices PARTITION ({name}))")
+                    partition_has_rows = cursor.fetchone()[0]
+                    if archive_has_rows and partition_has_rows:
+                        # Exchanging would swap the archived rows back in and DROP would delete them
+                        print(f"⚠️ Skipping {name}: {archive_table} already holds rows")
+                        continue
+                    if partition_has_rows:
+                        cursor.execute(f"ALTER TABLE electric_prices EXCHANGE PARTITION {name} WITH TABLE {archive_table}")
+                    # An empty partition was already exchanged by an earlier run (or never had rows)
+                    cursor.execute(f"ALTER TABLE electric_prices DROP PARTITION {name}")
+                    archived.append(archive_table)
+                print(f"✅ Archived {len(archived)} partitions")
+            except Error as e:
+                print(f"❌ Error archiving partitions: {e}")
+            finally:
+                connection.close()
+        return archived
+    
+    def _table_columns(self, cursor, table):
+        """Column names of a table in the current database (empty if it doesn't exist)"""
+        cursor.execute("""
+            SELECT COLUMN_NAME FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        """, (table,))
+        return {row[0] for row in cursor.fetchall()}
+    
+    def migrate_legacy_table(self):
+        """Convert the daily electric_prices table (DATE column) to the partitioned hourly schema.
+        
+        The new table is built and filled under a temporary name, then both tables
+        are swapped in one atomic RENAME TABLE, so electric_prices always exists and
+        a failed migration can simply be retried. A leftover electric_prices_legacy
+        next to a missing or empty electric_prices (an interrupted earlier migration)
+        is resumed by copying its rows into electric_prices.
+        """
+        legacy_table = config.PARTITION_CONFIG['legacy_table']
+        staging_table = config.PARTITION_CONFIG['migration_table']
+        connection = self.connect_database()
+        if not connection:
+            return False
+        try:
+            cursor = connection.cursor()
+            current_columns = self._table_columns(cursor, 'electric_prices')
+            if 'date' in current_columns:
+                source, target = 'electric_prices', staging_table
+            elif 'date' in self._table_columns(cursor, legacy_table):
+                rows = 0
+                if current_columns:
+                    cursor.execute("SELECT EXISTS (SELECT 1 FROM electric_prices)")
+                    rows = cursor.fetchone()[0]
+                if rows:
+                    print("✅ No legacy electric_prices table to migrate")
+                    return True
+                print(f"🔄 Resuming interrupted migration from {legacy_table}")
+                source, target = legacy_table, 'electric_prices'
+            else:
+                print("✅ No legacy electric_prices table to migrate")
+                return True
+            
+            cursor.execute(f"SELECT MAX(date) FROM {source}")
+            max_date = cursor.fetchone()[0]
+        except Error as e:
+            print(f"❌ Error preparing migration: {e}")
+            return False
+        finally:
+            connection.close()
+        
+        if not self.create_table(target):
+            return False
+        if max_date is not None and not self.ensure_partitions(max_date, target):
+            return False
+        
+        connection = self.connect_database()
+        if not connection:
+            return False
+        try:
+            cursor = connection.cursor()
+            cursor.execute(f"""
+                INSERT INTO {target} (ts, area, price_eur_mwh, timestamp)
+                SELECT CAST(date AS DATETIME), COALESCE(area, %s), price_eur_mwh, timestamp
+                FROM {source}
+                ON DUPLICATE KEY UPDATE price_eur_mwh = VALUES(price_eur_mwh)
+            """, (config.DATA_CONFIG['default_area'],))
+            migrated = cursor.rowcount
+            if target == staging_table:
+                cursor.execute(f"RENAME TABLE electric_prices TO {legacy_table}, {staging_table} TO electric_prices")
+            connection.commit()
+            print(f"✅ Migrated {migrated} records from {source}")
+            return True
+        except Error as e:
+            print(f"❌ Error migrating data: {e}")
+            return False
+        finally:
+            connection.close()
+    
     def load_csv_data(self):
         """Load data from CSV file"""
         try:
@@ -71,29 +276,36 @@ class DataProcessor:
         # Handle different possible column names
         date_cols = ['date', 'datetime', 'timestamp', 'time']
         price_cols = ['price', 'price_eur_mwh', 'price_eur', 'eur_mwh']
+        area_cols = ['area', 'zone', 'bidding_zone', 'region']
         
         date_col = None
         price_col = None
+        area_col = None
         
         for col in df.columns:
-            if any(d in col.lower() for d in date_cols):
+            if col == 'ts' or any(d in col.lower() for d in date_cols):
                 date_col = col
             if any(p in col.lower() for p in price_cols):
                 price_col = col
+            if any(a in col.lower() for a in area_cols):
+                area_col = col
         
         if not date_col or not price_col:
             print("❌ Required columns (date, price) not found")
             return None
         
         # Standardize column names
-        df = df.rename(columns={
-            date_col: 'date',
-            price_col: 'price_eur_mwh'
-        })
+        columns = {date_col: 'ts', price_col: 'price_eur_mwh'}
+        if area_col:
+            columns[area_col] = 'area'
+        df = df.rename(columns=columns)
         
-        # Convert date
-        df['date'] = pd.to_datetime(df['date'], errors='coerce')
-        df = df.dropna(subset=['date', 'price_eur_mwh'])
+        # Convert timestamps, keeping hourly (or finer) resolution.
+        # Timezone-aware feeds are normalised to naive UTC.
+        df['ts'] = pd.to_datetime(df['ts'], errors='coerce')
+        if getattr(df['ts'].dt, 'tz', None) is not None:
+            df['ts'] = df['ts'].dt.tz_convert('UTC').dt.tz_localize(None)
+        df = df.dropna(subset=['ts', 'price_eur_mwh'])
         
         # Convert price to numeric
         df['price_eur_mwh'] = pd.to_numeric(df['price_eur_mwh'], errors='coerce')
@@ -101,37 +313,60 @@ class DataProcessor:
         
         # Add area column if not exists
         if 'area' not in df.columns:
-            df['area'] = 'Finland'
+            df['area'] = config.DATA_CONFIG['default_area']
+        df['area'] = df['area'].fillna(config.DATA_CONFIG['default_area']).astype(str).str.strip()
         
-        # Remove duplicates
-        df = df.drop_duplicates(subset=['date', 'price_eur_mwh'])
+        # Remove duplicates - one price per (ts, area), the last one wins
+        df = df.drop_duplicates(subset=['ts', 'area'], keep='last')
+        df = df[['ts', 'area', 'price_eur_mwh']]
         
         print(f"✅ Cleaned data: {len(df)} records")
         return df
     
-    def insert_data_to_db(self, df):
-        """Insert data into MySQL database"""
+    def insert_data_to_db(self, df, add_partitions=True, changed=None):
+        """Upsert data into MySQL database in batches.
+        
+        If a `changed` dict is given it is filled with {area: earliest ts} of the
+        batches whose upsert actually inserted or modified rows, so re-ingesting
+        an unchanged file reports nothing changed.
+        """
+        if df is None:
+            return False
+        if add_partitions and not df.empty and not self.ensure_partitions(df['ts'].max()):
+            return False
+        
         connection = self.connect_database()
-        if connection and df is not None:
+        if connection:
             try:
                 cursor = connection.cursor()
                 
-                # Clear existing data
-                cursor.execute("DELETE FROM electric_prices")
-                
-                # Insert new data
+                # Re-ingesting a period overwrites its prices instead of clearing the table
                 insert_query = """
-                INSERT INTO electric_prices (date, price_eur_mwh, area)
+                INSERT INTO electric_prices (ts, area, price_eur_mwh)
                 VALUES (%s, %s, %s)
+                ON DUPLICATE KEY UPDATE price_eur_mwh = VALUES(price_eur_mwh)
                 """
                 
-                data_tuples = [
-                    (row['date'].date(), float(row['price_eur_mwh']), row.get('area', 'Finland'))
-                    for _, row in df.iterrows()
-                ]
+                # Time-ordered batches keep the changed ranges below tight
+                df = df.sort_values(['ts', 'area'])
+                data_tuples = list(zip(
+                    df['ts'].dt.to_pydatetime(),
+                    df['area'],
+                    df['price_eur_mwh'].astype(float).round(2)
+                ))
                 
-                cursor.executemany(insert_query, data_tuples)
-                connection.commit()
+                batch_size = config.DATA_CONFIG['insert_batch_size']
+                for start in range(0, len(data_tuples), batch_size):
+                    cursor.executemany(insert_query, data_tuples[start:start + batch_size])
+                    # Affected rows: 1 per insert, 2 per update, 0 for an unchanged row
+                    if changed is not None and cursor.rowcount:
+                        batch = df.iloc[start:start + batch_size]
+                        for area, min_ts in batch.groupby('area')['ts'].min().items():
+                            changed[area] = min(min_ts, changed.get(area, min_ts))
+                    connection.commit()
+                    done = min(start + batch_size, len(data_tuples))
+                    self.report_progress('insert_data_to_db', f"Inserted {done:,}/{len(data_tuples):,} rows",
+                                         done / len(data_tuples))
                 
                 print(f"✅ Inserted {len(data_tuples)} records into database")
                 return True
@@ -143,62 +378,220 @@ class DataProcessor:
                 connection.close()
         return False
     
-    def process_electric_prices(self):
-        """Complete data processing pipeline"""
+    def fetch_prices(self, start=None, end=None, areas=None):
+        """Read prices for an optional [start, end] range and list of areas.
+        
+        Filters are pushed down to MySQL so the query is served from the
+        idx_area_ts_price covering index and only the matching partitions.
+        Raises mysql.connector.Error so callers can choose their own fallback.
+        """
+        conditions = []
+        params = []
+        if start is not None:
+            conditions.append("ts >= %s")
+            params.append(pd.Timestamp(start).to_pydatetime())
+        if end is not None:
+            # end is inclusive at day resolution
+            conditions.append("ts < %s")
+            params.append((pd.Timestamp(end).normalize() + pd.Timedelta(days=1)).to_pydatetime())
+        if areas:
+            conditions.append(f"area IN ({', '.join(['%s'] * len(areas))})")
+            params.extend(areas)
+        
+        query = "SELECT ts, area, price_eur_mwh FROM electric_prices"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY area, ts"
+        
+        connection = mysql.connector.connect(**config.DB_CONFIG)
+        try:
+            cursor = connection.cursor()
+            cursor.execute(query, params)
+            df = pd.DataFrame(cursor.fetchall(), columns=['ts', 'area', 'price_eur_mwh'])
+        finally:
+            connection.close()
+        df['ts'] = pd.to_datetime(df['ts'])
+        df['price_eur_mwh'] = df['price_eur_mwh'].astype(float)
+        return df
+    
+    def get_data_bounds(self):
+        """Return first/last timestamp and the list of areas, or None if unavailable"""
+        connection = self.connect_database()
+        if connection:
+            try:
+                cursor = connection.cursor()
+                cursor.execute("SELECT MIN(ts), MAX(ts) FROM electric_prices")
+                min_ts, max_ts = cursor.fetchone()
+                cursor.execute("SELECT DISTINCT area FROM electric_prices ORDER BY area")
+                areas = [row[0] for row in cursor.fetchall()]
+                if min_ts is None:
+                    return None
+                return {
+                    'min_ts': pd.Timestamp(min_ts),
+                    'max_ts': pd.Timestamp(max_ts),
+                    'areas': areas
+                }
+            except Error as e:
+                print(f"❌ Error reading data bounds: {e}")
+                return None
+            finally:
+                connection.close()
+        return None
+    
+    def process_electric_prices(self, profile=False):
+        """Complete data processing pipeline, recorded in the pipeline_runs table"""
         print("🔄 Starting data processing pipeline...")
         
-        # Step 1: Create table
-        if not self.create_table():
+        run = PipelineRun(self.data_file, profile=profile or config.PIPELINE_CONFIG['profile'],
+                          on_stage=self._on_stage)
+        success = False
+        # Kept for callers that need more than success, e.g. whether rows changed
+        self.last_run = run
+        try:
+            success = self._run_pipeline(run)
+        finally:
+            run.finish(success)
+            self.record_run(run)
+        
+        if success:
+            print("✅ Data processing pipeline completed successfully!")
+        return success
+    
+    def _run_pipeline(self, run):
+        """Pipeline stages, each timed by run.stage()"""
+        # Step 1: Create table (migrating a legacy daily table first)
+        with run.stage('create_table') as stage:
+            stage.ok = self.migrate_legacy_table() and self.create_table()
+        if not stage.ok:
             return False
         
+        # Directory or glob sources are parsed in parallel, file by file
+        if not os.path.isfile(self.data_file):
+            from parallel_ingest import ParallelIngestor
+            with run.stage('parallel_ingest') as stage:
+                summary = ParallelIngestor(self, run=run).run(self.data_file)
+                stage.rows_in = summary['raw_rows']
+                stage.rows_out = summary['rows']
+                stage.worker_peak_rss_mb = summary['worker_peak_rss_mb']
+                stage.ok = not summary['failed'] and bool(summary['ingested'] or summary['skipped'])
+            run.rows_in, run.rows_out = stage.rows_in, stage.rows_out
+            run.changed = summary['changed']
+            # Files that were written still need their rolling metrics, even if others failed
+            if summary['changed']:
+                self.update_rolling_analytics(run, summary['changed'])
+            return stage.ok
+        
         # Step 2: Load CSV data
-        df = self.load_csv_data()
+        with run.stage('load_csv_data') as stage:
+            df = self.load_csv_data()
+            stage.ok = df is not None
+            stage.rows_out = run.rows_in = 0 if df is None else len(df)
         if df is None:
             return False
         
         # Step 3: Clean data
-        cleaned_df = self.clean_data(df)
+        with run.stage('clean_data', rows_in=len(df)) as stage:
+            cleaned_df = self.clean_data(df)
+            stage.ok = cleaned_df is not None
+            stage.rows_out = 0 if cleaned_df is None else len(cleaned_df)
         if cleaned_df is None:
             return False
         
         # Step 4: Insert into database
-        if not self.insert_data_to_db(cleaned_df):
+        changed = {}
+        with run.stage('insert_data_to_db', rows_in=len(cleaned_df)) as stage:
+            stage.ok = self.insert_data_to_db(cleaned_df, changed=changed)
+            stage.rows_out = run.rows_out = len(cleaned_df) if stage.ok else 0
+        # Batches committed before a failure count as changed too
+        run.changed = changed
+        if not stage.ok:
             return False
         
-        print("✅ Data processing pipeline completed successfully!")
+        # Step 5: Extend rolling analytics from the earliest changed row of each area
+        self.update_rolling_analytics(run, changed)
         return True
     
-    def get_sample_data(self):
+    def update_rolling_analytics(self, run, changed):
+        """Extend the persisted rolling series for {area: earliest changed ts}.
+        
+        Derived data only: a failure is recorded on the stage but does not fail the ingest.
+        """
+        from rolling_analytics import RollingAnalytics
+        with run.stage('rolling_analytics', rows_in=run.rows_out) as stage:
+            try:
+                rows = RollingAnalytics(self).update(changed)
+            except Exception as e:
+                print(f"❌ Rolling analytics failed: {e}")
+                stage.error = str(e)
+                rows = None
+            stage.ok = rows is not None
+            stage.rows_out = rows or 0
+        return stage.ok
+    
+    def record_run(self, run):
+        """Store a finished PipelineRun in the pipeline_runs table"""
+        connection = self.connect_database()
+        if connection:
+            try:
+                cursor = connection.cursor()
+                save_run(cursor, run)
+                connection.commit()
+                return True
+            except Error as e:
+                print(f"❌ Error recording pipeline run: {e}")
+                return False
+            finally:
+                connection.close()
+        return False
+    
+    def get_pipeline_runs(self, limit=None):
+        """Most recent pipeline runs, newest first, with stages decoded from JSON"""
+        limit = limit or config.PIPELINE_CONFIG['history_limit']
+        connection = self.connect_database()
+        if connection:
+            try:
+                cursor = connection.cursor(dictionary=True)
+                create_runs_table(cursor)
+                cursor.execute(f"""
+                    SELECT id, started_at, finished_at, source, status, rows_in, rows_out,
+                           total_seconds, peak_rss_mb, stages, profile_path, changed_from
+                    FROM {config.PIPELINE_CONFIG['runs_table']}
+                    ORDER BY started_at DESC
+                    LIMIT %s
+                """, (limit,))
+                runs = cursor.fetchall()
+                for row in runs:
+                    row['stages'] = json.loads(row['stages']) if row['stages'] else []
+                return runs
+            except Error as e:
+                print(f"❌ Error reading pipeline runs: {e}")
+            finally:
+                connection.close()
+        return []
+    
+    def get_sample_data(self, days=365, freq='D', areas=None):
         """Generate sample data if CSV not available"""
         print("🔧 Generating sample electric prices data...")
         
-        import numpy as np
-        from datetime import datetime, timedelta
-        
-        # Generate 365 days of sample data
-        start_date = datetime.now() - timedelta(days=365)
-        dates = [start_date + timedelta(days=x) for x in range(365)]
+        from synthetic_data import freq_step, generate_prices
         
-        # Generate realistic electric prices (30-150 EUR/MWh with seasonality)
-        base_price = 60
-        seasonal_variation = [20 * np.sin(2 * np.pi * x / 365) for x in range(365)]
-        random_variation = np.random.normal(0, 15, 365)
-        prices = [max(10, base_price + seasonal + random) 
-                 for seasonal, random in zip(seasonal_variation, random_variation)]
+        # One year of data ending today, in the legacy CSV layout by default
+        periods = int(pd.Timedelta(days=days) / freq_step(freq))
+        start = pd.Timestamp.now().normalize() - pd.Timedelta(days=days)
+        df = generate_prices(start, periods, areas or [config.DATA_CONFIG['default_area']], freq)
         
-        df = pd.DataFrame({
-            'date': dates,
-            'price_eur_mwh': prices,
-            'area': 'Finland'
-        })
-        
-        return df
+        return df.rename(columns={'ts': 'date'})[['date', 'price_eur_mwh', 'area']]
 
 if __name__ == "__main__":
-    processor = DataProcessor()
+    import sys
+    
+    # Optional arguments: CSV file, directory or glob pattern to ingest; --profile
+    args = [arg for arg in sys.argv[1:] if arg != '--profile']
+    profile = '--profile' in sys.argv[1:]
+    processor = DataProcessor(args[0] if args else None)
     
     # If CSV doesn't exist, create sample data
-    if not os.path.exists('data/Electric_prices.csv'):
+    if processor.data_file == config.DATA_CONFIG['csv_file'] and not os.path.exists(processor.data_file):
         print("📁 Creating data directory and sample data...")
         os.makedirs('data', exist_ok=True)
         
@@ -207,7 +600,7 @@ if __name__ == "__main__":
         print("✅ Sample data created: data/Electric_prices.csv")
     
     # Process the data
-    success = processor.process_electric_prices()
+    success = processor.process_electric_prices(profile=profile)
     if success:
         print("🎉 Data processing completed successfully!")
     else:
@@ -0,0 +1,272 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+import config
+
+
+def reset_peak_rss():
+    """Reset the kernel's peak-RSS counter so the next reading is per stage (Linux only)"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, kilobytes on Linux
+    return maxrss / (1024 * 1024) if sys.platform == 'darwin' else maxrss / 1024
+
+
+class StageMetrics:
+    """Timing and row counts for one pipeline stage"""
+
+    def __init__(self, name, rows_in=0):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = 0
+        self.ok = True
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self.seconds = 0.0
+        self.peak_rss_mb = None
+        # Largest peak RSS of any worker process used by the stage (parallel ingest)
+        self.worker_peak_rss_mb = None
+
+    @property
+    def rows_per_sec(self):
+        rows = max(self.rows_in, self.rows_out)
+        return rows / self.seconds if self.seconds > 0 else None
+
+    def to_dict(self):
+        return {
+            'stage': self.name,
+            'started_at': self.started_at.isoformat(),
+            'finished_at': self.finished_at.isoformat(),
+            'seconds': round(self.seconds, 6),
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'rows_per_sec': round(self.rows_per_sec, 1) if self.rows_per_sec else None,
+            'peak_rss_mb': round(self.peak_rss_mb, 1),
+            'worker_peak_rss_mb': round(self.worker_peak_rss_mb, 1) if self.worker_peak_rss_mb else None,
+            'ok': self.ok,
+            'error': self.error
+        }
+
+
+class _ProfileStats:
+    """cProfile stats collected in another process, in the form pstats.Stats.add() accepts"""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+class PipelineRun:
+    """Collects per-stage metrics for one process_electric_prices() run.
+
+    With profile=True the whole run is also captured with cProfile and
+    tracemalloc, and dumped to config.PIPELINE_CONFIG['profile_dir'].
+    cProfile only follows the calling thread, so work done in thread or
+    process pools is profiled with profile_call() / add_profile_stats()
+    and merged into the same report. tracemalloc covers this process only.
+    """
+
+    def __init__(self, source, profile=False, on_stage=None):
+        self.source = str(source)
+        self.profile = profile
+        # Optional hook called as on_stage(metrics, 'start' | 'end')
+        self.on_stage = on_stage
+        self.stages = []
+        # Rows read from the source and rows written to MySQL; set by the pipeline
+        self.rows_in = 0
+        self.rows_out = 0
+        # {area: earliest ts} the run actually inserted or modified; set by the pipeline
+        self.changed = {}
+        self.started_at = datetime.now()
+        self.finished_at = None
+        self.status = 'running'
+        self.profile_path = None
+        self._profiler = None
+        self._extra_profiles = []
+        self._profile_lock = threading.Lock()
+
+        if self.profile:
+            tracemalloc.start()
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    @contextmanager
+    def stage(self, name, rows_in=0):
+        """Time a stage; the caller sets rows_out/ok on the yielded StageMetrics"""
+        metrics = StageMetrics(name, rows_in)
+        reset_peak_rss()
+        metrics.started_at = datetime.now()
+        if self.on_stage:
+            self.on_stage(metrics, 'start')
+        start = time.perf_counter()
+        try:
+            yield metrics
+        except Exception as e:
+            metrics.ok = False
+            metrics.error = str(e)
+            raise
+        finally:
+            metrics.seconds = time.perf_counter() - start
+            metrics.finished_at = datetime.now()
+            metrics.peak_rss_mb = peak_rss_mb()
+            self.stages.append(metrics)
+            rate = f"{metrics.rows_per_sec:,.0f} rows/s" if metrics.rows_per_sec else "-"
+            workers = (f", workers {metrics.worker_peak_rss_mb:.0f} MB"
+                       if metrics.worker_peak_rss_mb else "")
+            print(f"⏱️ {name}: {metrics.seconds:.3f}s, {metrics.rows_in:,} → {metrics.rows_out:,} rows "
+                  f"({rate}), peak RSS {metrics.peak_rss_mb:.0f} MB{workers}")
+            if self.on_stage:
+                self.on_stage(metrics, 'end')
+
+    def profile_call(self, fn, *args):
+        """Run fn(*args) on a pool thread, profiled into this run when profiling"""
+        if not self.profile:
+            return fn(*args)
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Python 3.12+: the run's profiler is process-wide and already sees this thread
+            return fn(*args)
+        try:
+            return fn(*args)
+        finally:
+            profiler.disable()
+            with self._profile_lock:
+                self._extra_profiles.append(profiler)
+
+    def add_profile_stats(self, stats):
+        """Merge cProfile stats (Profile.stats) returned by a worker process"""
+        if self.profile and stats:
+            with self._profile_lock:
+                self._extra_profiles.append(_ProfileStats(stats))
+
+    @property
+    def changed_from(self):
+        """Earliest timestamp this run changed, or None if it changed no rows"""
+        if not self.changed:
+            return None
+        earliest = min(self.changed.values())
+        # pandas Timestamps from the cleaned frame; the connector wants a plain datetime
+        return earliest.to_pydatetime() if hasattr(earliest, 'to_pydatetime') else earliest
+
+    @property
+    def total_seconds(self):
+        end = self.finished_at or datetime.now()
+        return (end - self.started_at).total_seconds()
+
+    def finish(self, success):
+        self.finished_at = datetime.now()
+        self.status = 'success' if success else 'failed'
+        if self._profiler is not None:
+            self._profiler.disable()
+            self.profile_path = self._dump_profile()
+
+    def _dump_profile(self):
+        """Write the cProfile stats (.prof + readable .txt) and tracemalloc top allocations"""
+        profile_dir = config.PIPELINE_CONFIG['profile_dir']
+        os.makedirs(profile_dir, exist_ok=True)
+        base = os.path.join(profile_dir, f"run_{self.started_at:%Y%m%d_%H%M%S}")
+
+        report = io.StringIO()
+        stats = pstats.Stats(self._profiler, stream=report)
+        for extra in self._extra_profiles:
+            stats.add(extra)
+        stats.dump_stats(f"{base}.prof")
+        if self._extra_profiles:
+            report.write(f"Includes {len(self._extra_profiles)} profiles from pool threads and worker processes\n")
+        stats.sort_stats('cumulative').print_stats(40)
+
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        report.write(f"\ntracemalloc: current {current / 1024 / 1024:.1f} MB, peak {peak / 1024 / 1024:.1f} MB\n")
+        for stat in snapshot.statistics('lineno')[:25]:
+            report.write(f"{stat}\n")
+
+        with open(f"{base}.txt", 'w') as f:
+            f.write(report.getvalue())
+        print(f"🔬 Profile written to {base}.prof and {base}.txt")
+        return f"{base}.prof"
+
+    def to_row(self):
+        return (
+            self.started_at,
+            self.finished_at,
+            self.source[:512],
+            self.status,
+            self.rows_in,
+            self.rows_out,
+            round(self.total_seconds, 3),
+            round(max((s.peak_rss_mb for s in self.stages), default=peak_rss_mb()), 1),
+            json.dumps([s.to_dict() for s in self.stages]),
+            self.profile_path,
+            self.changed_from
+        )
+
+
+def create_runs_table(cursor):
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {config.PIPELINE_CONFIG['runs_table']} (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        started_at DATETIME(3) NOT NULL,
+        finished_at DATETIME(3),
+        source VARCHAR(512),
+        status VARCHAR(16) NOT NULL,
+        rows_in BIGINT NOT NULL DEFAULT 0,
+        rows_out BIGINT NOT NULL DEFAULT 0,
+        total_seconds DECIMAL(12,3),
+        peak_rss_mb DECIMAL(10,1),
+        stages JSON,
+        profile_path VARCHAR(512),
+        changed_from DATETIME,
+        INDEX idx_started_at (started_at)
+    )
+    """)
+    # Tables created before changed_from was added
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = 'changed_from'
+    """, (config.PIPELINE_CONFIG['runs_table'],))
+    if cursor.fetchone()[0] == 0:
+        cursor.execute(f"ALTER TABLE {config.PIPELINE_CONFIG['runs_table']} ADD COLUMN changed_from DATETIME")
+
+
+def save_run(cursor, run):
+    create_runs_table(cursor)
+    cursor.execute(f"""
+    INSERT INTO {config.PIPELINE_CONFIG['runs_table']}
+        (started_at, finished_at, source, status, rows_in, rows_out,
+         total_seconds, peak_rss_mb, stages, profile_path, changed_from)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """, run.to_row())
+    return cursor.lastrowid
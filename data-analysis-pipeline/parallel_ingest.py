@@ -0,0 +1,317 @@
+import cProfile
+import glob
+import hashlib
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from mysql.connector import Error
+
+import config
+from data_processor import DataProcessor
+from instrumentation import peak_rss_mb, reset_peak_rss
+
+
+def resolve_sources(source):
+    """Expand a CSV file, directory or glob pattern into a sorted list of files"""
+    if os.path.isdir(source):
+        return sorted(glob.glob(os.path.join(source, config.INGEST_CONFIG['file_pattern'])))
+    if any(ch in source for ch in '*?['):
+        return sorted(path for path in glob.glob(source) if os.path.isfile(path))
+    return [source] if os.path.isfile(source) else []
+
+
+def file_checksum(path, chunk_size=1024 * 1024):
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse_file(path, known_checksum=None, profile=False):
+    """Load and clean one CSV file (runs in a worker process).
+
+    Files whose checksum matches the manifest are skipped before parsing.
+    The result includes the worker's peak RSS while parsing, and with
+    profile=True its cProfile stats.
+    """
+    reset_peak_rss()
+    profiler = cProfile.Profile() if profile else None
+    if profiler:
+        profiler.enable()
+    try:
+        result = _parse_file(path, known_checksum)
+    finally:
+        if profiler:
+            profiler.disable()
+    result['peak_rss_mb'] = peak_rss_mb()
+    if profiler:
+        profiler.create_stats()
+        result['profile_stats'] = profiler.stats
+    return result
+
+
+def _parse_file(path, known_checksum):
+    checksum = file_checksum(path)
+    if checksum == known_checksum:
+        return {'path': path, 'checksum': checksum, 'skipped': True}
+
+    processor = DataProcessor(path)
+    df = processor.load_csv_data()
+    raw_rows = 0 if df is None else len(df)
+    df = processor.clean_data(df)
+    if df is None:
+        raise ValueError(f"No usable rows in {path}")
+
+    return {
+        'path': path,
+        'checksum': checksum,
+        'skipped': False,
+        'raw_rows': raw_rows,
+        'df': df
+    }
+
+
+class ParallelIngestor:
+    """Ingest many CSV files: parse in a process pool, write with a few DB writers"""
+
+    def __init__(self, processor=None, parse_workers=None, max_writers=None, max_retries=None, run=None):
+        self.processor = processor or DataProcessor()
+        # Optional PipelineRun: profiles parsers and writers when run.profile is set
+        self.run_metrics = run
+        self.parse_workers = parse_workers or config.INGEST_CONFIG['parse_workers']
+        self.max_writers = max_writers or config.INGEST_CONFIG['max_writers']
+        self.max_retries = config.INGEST_CONFIG['max_retries'] if max_retries is None else max_retries
+        self.manifest_table = config.INGEST_CONFIG['manifest_table']
+        # Runs in the parser processes; must be importable by name (spawn)
+        self.parse_func = parse_file
+        # Partition DDL must not run concurrently from several writers
+        self._partition_lock = threading.Lock()
+
+    def create_manifest_table(self):
+        """Create the ingest manifest table if it doesn't exist"""
+        connection = self.processor.connect_database()
+        if connection:
+            try:
+                cursor = connection.cursor()
+                cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.manifest_table} (
+                    file_path VARCHAR(512) NOT NULL PRIMARY KEY,
+                    checksum CHAR(64) NOT NULL,
+                    raw_rows INT NOT NULL DEFAULT 0,
+                    row_count INT NOT NULL DEFAULT 0,
+                    status VARCHAR(16) NOT NULL,
+                    attempts INT NOT NULL DEFAULT 1,
+                    error TEXT,
+                    ingested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+                )
+                """)
+                connection.commit()
+                return True
+            except Error as e:
+                print(f"❌ Error creating manifest table: {e}")
+                return False
+            finally:
+                connection.close()
+        return False
+
+    def load_manifest(self):
+        """Return {file_path: checksum} for files that were ingested successfully"""
+        connection = self.processor.connect_database()
+        if connection:
+            try:
+                cursor = connection.cursor()
+                cursor.execute(f"SELECT file_path, checksum FROM {self.manifest_table} WHERE status = 'done'")
+                return dict(cursor.fetchall())
+            except Error as e:
+                print(f"❌ Error reading manifest: {e}")
+            finally:
+                connection.close()
+        return {}
+
+    def record_manifest(self, path, checksum, status, attempts, raw_rows=0, row_count=0, error=None):
+        """Upsert the manifest entry for one file"""
+        connection = self.processor.connect_database()
+        if connection:
+            try:
+                cursor = connection.cursor()
+                cursor.execute(f"""
+                INSERT INTO {self.manifest_table}
+                    (file_path, checksum, raw_rows, row_count, status, attempts, error)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    checksum = VALUES(checksum), raw_rows = VALUES(raw_rows),
+                    row_count = VALUES(row_count), status = VALUES(status),
+                    attempts = VALUES(attempts), error = VALUES(error)
+                """, (path, checksum or '', raw_rows, row_count, status, attempts, error))
+                connection.commit()
+            except Error as e:
+                print(f"❌ Error updating manifest for {path}: {e}")
+            finally:
+                connection.close()
+
+    def _parse_pool(self):
+        # Spawned, not forked: run() may be called from a thread of a multi-threaded
+        # server (Streamlit), and forking there can deadlock on held locks
+        return ProcessPoolExecutor(max_workers=self.parse_workers,
+                                   mp_context=multiprocessing.get_context('spawn'))
+
+    def write_file(self, parsed):
+        """Insert one parsed file; raises so the caller can retry it"""
+        df = parsed['df']
+        if not df.empty:
+            with self._partition_lock:
+                if not self.processor.ensure_partitions(df['ts'].max()):
+                    raise RuntimeError("could not add partitions")
+        changed = {}
+        if not self.processor.insert_data_to_db(df, add_partitions=False, changed=changed):
+            raise RuntimeError("insert failed")
+        parsed['changed'] = changed
+        return parsed
+
+    def run(self, source):
+        """Ingest every file matched by `source`.
+
+        Returns a summary dict with 'ingested', 'skipped' and 'failed' entries
+        plus total 'raw_rows' parsed, 'rows' written, the earliest changed
+        timestamp per area in 'changed' (rows whose upsert was a no-op don't count)
+        and the largest parser process RSS in 'worker_peak_rss_mb'.
+        A failing file is retried on its own (re-parsed and re-written) up to
+        max_retries times; it never aborts the rest of the batch.
+
+        If a parser process dies (e.g. OOM-killed), the pool breaks and every
+        file in it fails at once. The pool is then rebuilt and those files are
+        re-parsed one at a time without using up a retry, so only a file whose
+        worker dies while it runs alone is charged the retry.
+        """
+        # Manifest keys are absolute, so relative and absolute invocations match
+        paths = [os.path.abspath(path) for path in resolve_sources(source)]
+        summary = {'ingested': [], 'skipped': [], 'failed': {}, 'raw_rows': 0, 'rows': 0, 'changed': {},
+                   'worker_peak_rss_mb': None}
+        profile = self.run_metrics is not None and self.run_metrics.profile
+        if not paths:
+            print(f"❌ No CSV files found for: {source}")
+            return summary
+        if not self.create_manifest_table():
+            summary['failed'] = {path: 'manifest unavailable' for path in paths}
+            return summary
+
+        known = self.load_manifest()
+        print(f"🔄 Ingesting {len(paths)} files with {self.parse_workers} parsers "
+              f"and {self.max_writers} writers...")
+
+        queue = deque((path, 1) for path in paths)
+        # Files in flight when the parse pool broke; parsed one at a time
+        suspects = deque()
+        parsing = {}
+        writing = {}
+        # Bound the parsed DataFrames held in memory at once
+        in_flight_limit = self.parse_workers + self.max_writers * 2
+
+        def retry_or_fail(path, attempt, error, checksum=None):
+            if attempt <= self.max_retries:
+                print(f"⚠️ {os.path.basename(path)} failed (attempt {attempt}): {error} - retrying")
+                queue.append((path, attempt + 1))
+            else:
+                print(f"❌ {os.path.basename(path)} failed after {attempt} attempts: {error}")
+                summary['failed'][path] = str(error)
+                self.record_manifest(path, checksum, 'failed', attempt, error=str(error))
+
+        def pool_broken(parsers):
+            """Charge the isolated file (if any), queue the rest as suspects and rebuild the pool"""
+            for path, attempt, isolated in parsing.values():
+                if isolated:
+                    retry_or_fail(path, attempt, "parser process died")
+                else:
+                    suspects.append((path, attempt))
+            parsing.clear()
+            parsers.shutdown(wait=False, cancel_futures=True)
+            print("⚠️ A parser process died; restarting the pool")
+            return self._parse_pool()
+
+        parsers = self._parse_pool()
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_writers) as writers:
+                while queue or suspects or parsing or writing:
+                    # Isolate suspects so a repeated crash identifies its file: nothing
+                    # else is submitted until the last isolated one has finished
+                    if suspects or any(isolated for _, _, isolated in parsing.values()):
+                        if suspects and not parsing:
+                            path, attempt = suspects.popleft()
+                            known_checksum = known.get(path) if attempt == 1 else None
+                            try:
+                                future = parsers.submit(self.parse_func, path, known_checksum, profile)
+                            except BrokenProcessPool:
+                                suspects.appendleft((path, attempt))
+                                parsers = pool_broken(parsers)
+                                continue
+                            parsing[future] = (path, attempt, True)
+                    else:
+                        while queue and len(parsing) + len(writing) < in_flight_limit:
+                            path, attempt = queue.popleft()
+                            # A retried file is always re-parsed, even if its checksum is known
+                            known_checksum = known.get(path) if attempt == 1 else None
+                            try:
+                                future = parsers.submit(self.parse_func, path, known_checksum, profile)
+                            except BrokenProcessPool:
+                                queue.appendleft((path, attempt))
+                                parsers = pool_broken(parsers)
+                                break
+                            parsing[future] = (path, attempt, False)
+
+                    done, _ = wait(list(parsing) + list(writing), return_when=FIRST_COMPLETED)
+                    for future in done:
+                        if future in parsing:
+                            path, attempt, _ = parsing[future]
+                            try:
+                                parsed = future.result()
+                            except BrokenProcessPool:
+                                parsers = pool_broken(parsers)
+                                continue
+                            except Exception as e:
+                                del parsing[future]
+                                retry_or_fail(path, attempt, e)
+                                continue
+                            del parsing[future]
+                            summary['worker_peak_rss_mb'] = max(parsed['peak_rss_mb'],
+                                                                summary['worker_peak_rss_mb'] or 0)
+                            if self.run_metrics is not None:
+                                self.run_metrics.add_profile_stats(parsed.pop('profile_stats', None))
+                            if parsed['skipped']:
+                                summary['skipped'].append(path)
+                                continue
+                            if profile:
+                                task = writers.submit(self.run_metrics.profile_call, self.write_file, parsed)
+                            else:
+                                task = writers.submit(self.write_file, parsed)
+                            writing[task] = (parsed, attempt)
+                        elif future in writing:
+                            parsed, attempt = writing.pop(future)
+                            path = parsed['path']
+                            try:
+                                future.result()
+                            except Exception as e:
+                                retry_or_fail(path, attempt, e, parsed['checksum'])
+                                continue
+                            self.record_manifest(path, parsed['checksum'], 'done', attempt,
+                                                 parsed['raw_rows'], len(parsed['df']))
+                            summary['ingested'].append(path)
+                            summary['raw_rows'] += parsed['raw_rows']
+                            summary['rows'] += len(parsed['df'])
+                            for area, min_ts in parsed['changed'].items():
+                                summary['changed'][area] = min(min_ts, summary['changed'].get(area, min_ts))
+
+                    finished = len(summary['ingested']) + len(summary['skipped']) + len(summary['failed'])
+                    self.processor.report_progress('parallel_ingest', f"{finished}/{len(paths)} files done",
+                                                   finished / len(paths))
+        finally:
+            parsers.shutdown(wait=True, cancel_futures=True)
+
+        print(f"✅ Ingested {len(summary['ingested'])} files, skipped {len(summary['skipped'])} "
+              f"unchanged, {len(summary['failed'])} failed")
+        return summary
@@ -0,0 +1,291 @@
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+
+from mysql.connector import Error
+
+import config
+from data_processor import DataProcessor
+
+# Share of the overall progress bar covered by each pipeline stage
+STAGE_PROGRESS = {
+    'create_table': (0.0, 0.05),
+    'load_csv_data': (0.05, 0.25),
+    'clean_data': (0.25, 0.35),
+    'insert_data_to_db': (0.35, 0.9),
+    'parallel_ingest': (0.05, 0.9),
+    'rolling_analytics': (0.9, 1.0)
+}
+
+
+class CronSchedule:
+    """Minimal 5-field cron expression: minute hour day-of-month month day-of-week.
+
+    Supports '*', numbers, lists (1,15), ranges (1-5) and steps (*/15, 0-30/5).
+    Day-of-week is 0-6 with 0 (or 7) = Sunday.
+    """
+
+    FIELDS = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+    def __init__(self, expression):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expression!r}")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, self.weekdays = [
+            self._parse(part, low, high) for part, (low, high) in zip(parts, self.FIELDS)
+        ]
+        self.weekdays = {0 if day == 7 else day for day in self.weekdays}
+        # Standard cron: when both day fields are restricted, either may match
+        self._day_or = parts[2] != '*' and parts[4] != '*'
+
+    @staticmethod
+    def _parse(field, low, high):
+        values = set()
+        for part in field.split(','):
+            step = 1
+            if '/' in part:
+                part, step = part.split('/')
+                step = int(step)
+            if part == '*':
+                start, end = low, high
+            elif '-' in part:
+                start, end = map(int, part.split('-'))
+            else:
+                start = int(part)
+                end = high if step > 1 else start
+            if start < low or end > high or start > end or step < 1:
+                raise ValueError(f"Invalid cron field: {field!r}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def matches(self, moment):
+        weekday = (moment.weekday() + 1) % 7
+        day_match = moment.day in self.days
+        weekday_match = weekday in self.weekdays
+        day_ok = (day_match or weekday_match) if self._day_or else (day_match and weekday_match)
+        return (moment.minute in self.minutes and moment.hour in self.hours
+                and moment.month in self.months and day_ok)
+
+    def next_after(self, moment):
+        """First matching minute strictly after `moment`"""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 4)
+        while candidate < limit:
+            if candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+                continue
+            if self.matches(candidate):
+                return candidate
+            candidate += timedelta(minutes=1)
+        raise ValueError(f"Cron expression never matches: {self.expression!r}")
+
+
+class RefreshJob:
+    """State and progress feed of one background refresh"""
+
+    def __init__(self, job_id, source, trigger):
+        self.id = job_id
+        self.source = source
+        self.trigger = trigger
+        self.status = 'queued'
+        self.stage = None
+        self.fraction = 0.0
+        self.message = "Queued"
+        self.error = None
+        self.created_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+        self.events = deque(maxlen=200)
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def is_active(self):
+        return self.status in ('queued', 'running')
+
+    def report(self, stage, message, fraction=None):
+        """Progress callback for DataProcessor.progress_callback"""
+        with self._lock:
+            if stage in STAGE_PROGRESS and fraction is not None:
+                if fraction == 0.0:
+                    self.stage = stage
+                # Nested reports (e.g. inserts inside parallel_ingest) only add messages
+                if stage == self.stage:
+                    start, end = STAGE_PROGRESS[stage]
+                    self.fraction = max(self.fraction, start + (end - start) * min(fraction, 1.0))
+            self.message = message
+            self.events.append((datetime.now(), stage, message))
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'id': self.id,
+                'source': self.source,
+                'trigger': self.trigger,
+                'status': self.status,
+                'stage': self.stage,
+                'fraction': self.fraction,
+                'message': self.message,
+                'error': self.error,
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'events': list(self.events)
+            }
+
+
+class RefreshJobRunner:
+    """Runs data refreshes on a background thread, one at a time.
+
+    submit() is single-flight: while a refresh is running, further requests
+    join it instead of starting a second concurrent reload. A MySQL named
+    lock extends this across processes (several Streamlit servers, cron).
+    Completion callbacks and data_version let readers invalidate caches.
+    """
+
+    def __init__(self, source=None):
+        self.source = source
+        self.data_version = 0
+        self._lock = threading.Lock()
+        self._current = None
+        self._history = deque(maxlen=config.REFRESH_CONFIG['history'])
+        self._next_id = 1
+        self._callbacks = []
+        self._scheduler = None
+        self._stop = threading.Event()
+
+    def on_complete(self, callback):
+        """Register callback(job) to run after every refresh that changed rows,
+        including failed refreshes that committed some batches before failing"""
+        self._callbacks.append(callback)
+
+    def submit(self, trigger='manual'):
+        """Start a refresh, or return the one already running"""
+        with self._lock:
+            if self._current is not None and self._current.is_active:
+                return self._current
+            job = RefreshJob(self._next_id, self.source or config.DATA_CONFIG['csv_file'], trigger)
+            self._next_id += 1
+            self._current = job
+            self._history.appendleft(job)
+        threading.Thread(target=self._run, args=(job,), name=f"refresh-job-{job.id}", daemon=True).start()
+        return job
+
+    @property
+    def current_job(self):
+        return self._current
+
+    def jobs(self):
+        """Recent jobs, newest first"""
+        with self._lock:
+            return list(self._history)
+
+    def _acquire_db_lock(self, processor):
+        """Take the cross-process refresh lock; returns (acquired, connection)"""
+        connection = processor.connect_database()
+        if connection is None:
+            # No database: let the pipeline itself report the failure
+            return True, None
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT GET_LOCK(%s, 0)", (config.REFRESH_CONFIG['lock_name'],))
+            if cursor.fetchone()[0] == 1:
+                return True, connection
+        except Error as e:
+            print(f"⚠️ Could not take refresh lock: {e}")
+        connection.close()
+        return False, None
+
+    def _run(self, job):
+        processor = DataProcessor(self.source)
+        processor.progress_callback = job.report
+        job.started_at = datetime.now()
+        job.status = 'running'
+
+        acquired, lock_connection = self._acquire_db_lock(processor)
+        if not acquired:
+            # Not a failure: the refresh holding the lock loads the same source
+            job.finished_at = datetime.now()
+            job.status = 'skipped'
+            job.report(None, "Skipped: another refresh is already running on a different server")
+            job._done.set()
+            return
+
+        success = False
+        try:
+            job.report(None, f"Refreshing from {job.source}")
+            success = processor.process_electric_prices()
+            if not success:
+                job.error = "Data processing failed; see the pipeline run history"
+        except Exception as e:
+            job.error = str(e)
+        finally:
+            if lock_connection is not None:
+                try:
+                    lock_connection.cursor().execute("SELECT RELEASE_LOCK(%s)", (config.REFRESH_CONFIG['lock_name'],))
+                except Error:
+                    pass
+                lock_connection.close()
+
+        job.finished_at = datetime.now()
+        if success:
+            job.fraction = 1.0
+        # A failed run may still have committed batches; readers must see those too
+        run = getattr(processor, 'last_run', None)
+        if run is not None and run.changed_from is not None:
+            with self._lock:
+                self.data_version += 1
+            for callback in self._callbacks:
+                try:
+                    callback(job)
+                except Exception as e:
+                    print(f"⚠️ Refresh completion callback failed: {e}")
+        job.status = 'success' if success else 'failed'
+        job.report(None, "Refresh completed" if success else f"Refresh failed: {job.error}")
+        job._done.set()
+
+    def start_scheduler(self, expression):
+        """Submit scheduled refreshes according to a cron expression"""
+        if self._scheduler is not None:
+            return
+        schedule = CronSchedule(expression)
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.is_set():
+                next_run = schedule.next_after(datetime.now())
+                if self._stop.wait(max(0.0, (next_run - datetime.now()).total_seconds())):
+                    break
+                self.submit(trigger='schedule')
+
+        self._scheduler = threading.Thread(target=loop, name="refresh-scheduler", daemon=True)
+        self._scheduler.start()
+        print(f"🕒 Scheduled refreshes: {expression}")
+
+    def stop_scheduler(self):
+        self._stop.set()
+        if self._scheduler is not None:
+            self._scheduler.join(timeout=5)
+            self._scheduler = None
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Run scheduled refreshes without the dashboard, e.g.:
+    #   python3 refresh_jobs.py "0 * * * *"
+    expression = sys.argv[1] if len(sys.argv) > 1 else config.REFRESH_CONFIG['schedule']
+    if not expression:
+        print("❌ Pass a cron expression or set REFRESH_SCHEDULE")
+        sys.exit(1)
+
+    runner = RefreshJobRunner()
+    runner.start_scheduler(expression)
+    try:
+        runner._scheduler.join()
+    except KeyboardInterrupt:
+        runner.stop_scheduler()
@@ -0,0 +1,345 @@
+import json
+import math
+
+import numpy as np
+import pandas as pd
+from mysql.connector import Error
+from numpy.lib.stride_tricks import sliding_window_view
+
+import config
+
+# Positions reduced per numpy call in _rolling()
+ROLLING_BLOCK_ROWS = 8192
+
+
+class RollingState:
+    """Per-area state needed to extend the rolling series without a full recompute"""
+
+    def __init__(self, area, last_ts=None, tail=None, ewma=None, row_count=0, params=None):
+        self.area = area
+        self.last_ts = last_ts
+        # Most recent prices, enough to fill the longest window
+        self.tail = np.asarray(tail if tail is not None else [], dtype=float)
+        self.ewma = ewma
+        self.row_count = row_count
+        self.params = params
+
+
+def params_signature(windows, ewma_span, spike_window, spike_threshold):
+    return json.dumps([sorted(windows), ewma_span, spike_window, spike_threshold])
+
+
+def _rolling(values, window, positions):
+    """Mean and sample std of `values[i - window + 1 : i + 1]` for each i in positions.
+
+    Positions without a full window get NaN. Every window is reduced on its own
+    (no running sums), so the result for a given window never depends on where
+    the series was split between incremental updates.
+    """
+    mean = np.full(len(positions), np.nan)
+    std = np.full(len(positions), np.nan)
+    if len(values) < window or len(positions) == 0:
+        return mean, std
+
+    # positions are consecutive, so the windows needed are a contiguous slice
+    windows = sliding_window_view(values, window)
+    first = int(np.searchsorted(positions - window + 1, 0))
+    start = positions[first] - window + 1 if first < len(positions) else 0
+    # Reduce in blocks to bound the (block x window) temporaries of std()
+    for offset in range(first, len(positions), ROLLING_BLOCK_ROWS):
+        stop = min(offset + ROLLING_BLOCK_ROWS, len(positions))
+        selected = windows[start + offset - first:start + stop - first]
+        mean[offset:stop] = selected.mean(axis=1)
+        std[offset:stop] = selected.std(axis=1, ddof=1) if window > 1 else 0.0
+    return mean, std
+
+
+def _ewma(values, alpha, initial=None):
+    """y[t] = alpha * x[t] + (1 - alpha) * y[t-1] (pandas adjust=False), in numpy blocks.
+
+    Within a block the recursion is a scaled cumulative sum; blocks are sized
+    so the (1 - alpha) ** -k scale factors stay well inside float64 range.
+    """
+    out = np.empty(len(values))
+    if len(values) == 0:
+        return out
+    decay = 1.0 - alpha
+    if decay <= 0.0:
+        return values.astype(float)
+    block = max(1, min(4096, int(150 / -math.log10(decay)) if decay < 1.0 else 4096))
+    previous = values[0] if initial is None else initial
+    for start in range(0, len(values), block):
+        chunk = values[start:start + block]
+        k = np.arange(len(chunk))
+        scale = decay ** -k
+        out[start:start + len(chunk)] = (
+            decay ** (k + 1) * previous + alpha * decay ** k * np.cumsum(chunk * scale)
+        )
+        previous = out[start + len(chunk) - 1]
+    if initial is None:
+        out[0] = values[0]
+    return out
+
+
+def extend(prices, timestamps, state, windows=None, ewma_span=None, spike_window=None, spike_threshold=None):
+    """Compute rolling metrics for new prices appended after `state`.
+
+    Returns (metrics DataFrame for the new rows, updated RollingState).
+    Calling it once over a whole series or repeatedly over consecutive
+    chunks gives the same results.
+    """
+    rolling_config = config.ROLLING_CONFIG
+    windows = windows or rolling_config['windows']
+    ewma_span = ewma_span or rolling_config['ewma_span']
+    spike_window = spike_window or rolling_config['spike_window']
+    spike_threshold = spike_threshold or rolling_config['spike_threshold']
+
+    prices = np.asarray(prices, dtype=float)
+    # Positional from here on, whatever index a Series argument carried
+    timestamps = pd.DatetimeIndex(timestamps)
+    tail = state.tail
+    values = np.concatenate([tail, prices])
+    # One extra leading position gives each window's stats just before the new rows
+    positions = np.arange(len(tail) - 1, len(values))
+
+    metrics = {'ts': timestamps, 'price_eur_mwh': prices}
+    previous = {}
+    for window in sorted(set(windows) | {spike_window}):
+        mean, std = _rolling(values, window, positions)
+        previous[window] = (mean[:-1], std[:-1])
+        if window in windows:
+            metrics[f'mean_{window}'], metrics[f'std_{window}'] = mean[1:], std[1:]
+
+    # Spikes are judged against the window *before* each price
+    prev_mean, prev_std = previous[spike_window]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z = np.abs(prices - prev_mean) / prev_std
+    metrics['is_spike'] = np.nan_to_num(z, nan=0.0, posinf=0.0) > spike_threshold
+
+    alpha = 2.0 / (ewma_span + 1.0)
+    metrics['ewma'] = _ewma(prices, alpha, state.ewma)
+
+    keep = max(max(windows), spike_window)
+    new_state = RollingState(
+        state.area,
+        last_ts=timestamps[-1].to_pydatetime() if len(prices) else state.last_ts,
+        tail=values[-keep:],
+        ewma=float(metrics['ewma'][-1]) if len(prices) else state.ewma,
+        row_count=state.row_count + len(prices),
+        params=params_signature(windows, ewma_span, spike_window, spike_threshold)
+    )
+    return pd.DataFrame(metrics), new_state
+
+
+class RollingAnalytics:
+    """Persists rolling metrics per area and extends them after each ingest"""
+
+    def __init__(self, processor):
+        self.processor = processor
+        self.windows = config.ROLLING_CONFIG['windows']
+        self.spike_window = config.ROLLING_CONFIG['spike_window']
+        self.params = params_signature(self.windows, config.ROLLING_CONFIG['ewma_span'],
+                                       self.spike_window, config.ROLLING_CONFIG['spike_threshold'])
+        self.metrics_table = config.ROLLING_CONFIG['metrics_table']
+        self.state_table = config.ROLLING_CONFIG['state_table']
+        self.metric_columns = [c for w in self.windows for c in (f'mean_{w}', f'std_{w}')] + ['ewma']
+
+    def create_tables(self, cursor):
+        metric_ddl = ",\n".join(f"{column} DOUBLE" for column in self.metric_columns)
+        cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {self.metrics_table} (
+            area VARCHAR(50) NOT NULL,
+            ts DATETIME NOT NULL,
+            price_eur_mwh DECIMAL(10,2) NOT NULL,
+            {metric_ddl},
+            is_spike TINYINT(1) NOT NULL DEFAULT 0,
+            PRIMARY KEY (area, ts)
+        ) ENGINE=InnoDB
+        """)
+        cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {self.state_table} (
+            area VARCHAR(50) NOT NULL PRIMARY KEY,
+            last_ts DATETIME,
+            tail JSON,
+            ewma DOUBLE,
+            row_count BIGINT NOT NULL DEFAULT 0,
+            params VARCHAR(255),
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB
+        """)
+
+    def load_state(self, cursor, area):
+        cursor.execute(f"SELECT last_ts, tail, ewma, row_count, params FROM {self.state_table} WHERE area = %s",
+                       (area,))
+        row = cursor.fetchone()
+        if row is None:
+            return RollingState(area)
+        last_ts, tail, ewma, row_count, params = row
+        return RollingState(area, last_ts, json.loads(tail) if tail else [], ewma, row_count, params)
+
+    def save_state(self, cursor, state):
+        cursor.execute(f"""
+        INSERT INTO {self.state_table} (area, last_ts, tail, ewma, row_count, params)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE last_ts = VALUES(last_ts), tail = VALUES(tail), ewma = VALUES(ewma),
+            row_count = VALUES(row_count), params = VALUES(params)
+        """, (state.area, state.last_ts, json.dumps(state.tail.tolist()), state.ewma,
+              state.row_count, state.params))
+
+    def write_metrics(self, cursor, area, metrics):
+        columns = ['price_eur_mwh'] + self.metric_columns + ['is_spike']
+        insert_query = f"""
+        INSERT INTO {self.metrics_table} (area, ts, {', '.join(columns)})
+        VALUES (%s, %s, {', '.join(['%s'] * len(columns))})
+        ON DUPLICATE KEY UPDATE {', '.join(f'{c} = VALUES({c})' for c in columns)}
+        """
+        values = metrics[columns].astype(object).where(metrics[columns].notna(), None)
+        values['is_spike'] = metrics['is_spike'].astype(int)
+        rows = [
+            (area, ts) + tuple(row)
+            for ts, row in zip(metrics['ts'].dt.to_pydatetime(), values.itertuples(index=False, name=None))
+        ]
+        batch_size = config.DATA_CONFIG['insert_batch_size']
+        for start in range(0, len(rows), batch_size):
+            cursor.executemany(insert_query, rows[start:start + batch_size])
+
+    def reseed_state(self, cursor, state, changed_from):
+        """State as it was just before `changed_from`, rebuilt from the stored metrics.
+
+        Drops the metric rows from `changed_from` on; the tail and EWMA come from
+        the rows before it, so only the changed range is recomputed.
+        """
+        cursor.execute(f"DELETE FROM {self.metrics_table} WHERE area = %s AND ts >= %s",
+                       (state.area, changed_from))
+        row_count = max(0, state.row_count - cursor.rowcount)
+        keep = max(max(self.windows), self.spike_window)
+        cursor.execute(f"SELECT ts, price_eur_mwh, ewma FROM {self.metrics_table} "
+                       "WHERE area = %s AND ts < %s ORDER BY ts DESC LIMIT %s",
+                       (state.area, changed_from, keep))
+        rows = cursor.fetchall()[::-1]
+        if not rows:
+            return RollingState(state.area, params=self.params)
+        return RollingState(state.area, last_ts=rows[-1][0], tail=[float(row[1]) for row in rows],
+                            ewma=rows[-1][2], row_count=row_count, params=self.params)
+
+    def update_area(self, connection, area, changed_from=None):
+        """Extend one area's series in one transaction.
+
+        If rows at or before the last processed timestamp changed, the series is
+        recomputed from `changed_from` only; changed parameters rebuild it all.
+        Readers keep seeing the previous series until the transaction commits.
+        """
+        cursor = connection.cursor()
+        connection.start_transaction()
+        try:
+            new_rows = self._update_area(cursor, area, changed_from)
+            connection.commit()
+            return new_rows
+        except Exception:
+            connection.rollback()
+            raise
+
+    def _update_area(self, cursor, area, changed_from):
+        state = self.load_state(cursor, area)
+        rebuild = state.params != self.params
+        if rebuild:
+            cursor.execute(f"DELETE FROM {self.metrics_table} WHERE area = %s", (area,))
+            state = RollingState(area, params=self.params)
+        elif (changed_from is not None and state.last_ts is not None
+              and pd.Timestamp(changed_from) <= pd.Timestamp(state.last_ts)):
+            rebuild = True
+            state = self.reseed_state(cursor, state, pd.Timestamp(changed_from).to_pydatetime())
+
+        # Streamed on its own connection (served from the covering index)
+        # so metric writes can interleave with the unbuffered read
+        read_connection = self.processor.connect_database()
+        if read_connection is None:
+            raise Error("Database connection not available")
+        read_cursor = read_connection.cursor()
+        if state.last_ts is None:
+            read_cursor.execute("SELECT ts, price_eur_mwh FROM electric_prices WHERE area = %s ORDER BY ts", (area,))
+        else:
+            read_cursor.execute("SELECT ts, price_eur_mwh FROM electric_prices WHERE area = %s AND ts > %s "
+                                "ORDER BY ts", (area, state.last_ts))
+
+        new_rows = 0
+        try:
+            while True:
+                rows = read_cursor.fetchmany(config.ROLLING_CONFIG['chunk_rows'])
+                if not rows:
+                    break
+                chunk = pd.DataFrame(rows, columns=['ts', 'price_eur_mwh'])
+                metrics, state = extend(chunk['price_eur_mwh'].astype(float).to_numpy(),
+                                        pd.to_datetime(chunk['ts']), state)
+                self.write_metrics(cursor, area, metrics)
+                new_rows += len(metrics)
+        finally:
+            read_connection.close()
+
+        if new_rows or rebuild:
+            self.save_state(cursor, state)
+        return new_rows
+
+    def update(self, changed=None):
+        """Extend rolling metrics for the given {area: earliest ingested ts}, or all areas.
+
+        Returns the number of new metric rows written, or None on error.
+        """
+        connection = self.processor.connect_database()
+        if not connection:
+            return None
+        try:
+            cursor = connection.cursor()
+            self.create_tables(cursor)
+            if changed is None:
+                cursor.execute("SELECT DISTINCT area FROM electric_prices")
+                changed = {row[0]: None for row in cursor.fetchall()}
+            total = 0
+            for area, changed_from in changed.items():
+                total += self.update_area(connection, area, changed_from)
+            print(f"✅ Rolling analytics extended by {total} rows")
+            return total
+        except Error as e:
+            print(f"❌ Error updating rolling analytics: {e}")
+            return None
+        finally:
+            connection.close()
+
+    def fetch_metrics(self, start=None, end=None, areas=None):
+        """Precomputed rolling series for a range; raises mysql.connector.Error"""
+        conditions, params = [], []
+        if start is not None:
+            conditions.append("ts >= %s")
+            params.append(pd.Timestamp(start).to_pydatetime())
+        if end is not None:
+            conditions.append("ts < %s")
+            params.append((pd.Timestamp(end).normalize() + pd.Timedelta(days=1)).to_pydatetime())
+        if areas:
+            conditions.append(f"area IN ({', '.join(['%s'] * len(areas))})")
+            params.extend(areas)
+
+        columns = ['area', 'ts', 'price_eur_mwh'] + self.metric_columns + ['is_spike']
+        query = f"SELECT {', '.join(columns)} FROM {self.metrics_table}"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY area, ts"
+
+        connection = self.processor.connect_database()
+        if connection is None:
+            raise Error("Database connection not available")
+        try:
+            cursor = connection.cursor()
+            self.create_tables(cursor)
+            cursor.execute(query, params)
+            df = pd.DataFrame(cursor.fetchall(), columns=columns)
+        finally:
+            connection.close()
+        df['ts'] = pd.to_datetime(df['ts'])
+        df[columns[2:]] = df[columns[2:]].astype(float)
+        df['is_spike'] = df['is_spike'].astype(bool)
+        return df
+
+
+if __name__ == "__main__":
+    from data_processor import DataProcessor
+    RollingAnalytics(DataProcessor()).update()
@@ -96,12 +96,18 @@ mkdir -p $APP_DIR/logs
 if [ -f "app.py" ]; then
     cp app.py $APP_DIR/
     cp data_processor.py $APP_DIR/
+    cp parallel_ingest.py $APP_DIR/
+    cp synthetic_data.py $APP_DIR/
+    cp instrumentation.py $APP_DIR/
+    cp refresh_jobs.py $APP_DIR/
+    cp analytics_api.py $APP_DIR/
+    cp rolling_analytics.py $APP_DIR/
     cp config.py $APP_DIR/
     cp requirements.txt $APP_DIR/
     print_status "Application files copied"
 else
     print_warning "Application files not found in current directory"
-    print_info "You'll need to upload app.py, data_processor.py, config.py, and requirements.txt"
+    print_info "You'll need to upload app.py, data_processor.py, parallel_ingest.py, synthetic_data.py, instrumentation.py, refresh_jobs.py, analytics_api.py, rolling_analytics.py, config.py, and requirements.txt"
 fi
 
 # Set ownership
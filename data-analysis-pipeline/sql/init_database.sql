@@ -10,53 +10,69 @@ COLLATE utf8mb4_unicode_ci;
 USE electric_data;
 
 -- Create electric_prices table
+-- Hourly (or finer) prices per bidding zone, range-partitioned by month on ts.
+-- New months are added by splitting pmax (DataProcessor.ensure_partitions) and
+-- old months are archived with EXCHANGE PARTITION (DataProcessor.archive_partitions).
 CREATE TABLE IF NOT EXISTS electric_prices (
-    id INT AUTO_INCREMENT PRIMARY KEY,
-    date DATE NOT NULL,
+    ts DATETIME NOT NULL,
+    area VARCHAR(50) NOT NULL DEFAULT 'Finland',
     price_eur_mwh DECIMAL(10,2) NOT NULL,
-    area VARCHAR(50) DEFAULT 'Finland',
     timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     
-    -- Indexes for performance
-    INDEX idx_date (date),
-    INDEX idx_price (price_eur_mwh),
-    INDEX idx_area (area),
+    -- Natural key; must include the partitioning column
+    PRIMARY KEY (ts, area),
     
-    -- Constraints
-    UNIQUE KEY unique_date_area (date, area),
-    CHECK (price_eur_mwh >= 0)
-) ENGINE=InnoDB;
+    -- Covering index for per-area range queries
+    INDEX idx_area_ts_price (area, ts, price_eur_mwh)
+) ENGINE=InnoDB
+PARTITION BY RANGE COLUMNS (ts) (
+    PARTITION p_before VALUES LESS THAN ('2024-01-01'),
+    PARTITION p202401 VALUES LESS THAN ('2024-02-01'),
+    PARTITION p202402 VALUES LESS THAN ('2024-03-01'),
+    PARTITION p202403 VALUES LESS THAN ('2024-04-01'),
+    PARTITION p202404 VALUES LESS THAN ('2024-05-01'),
+    PARTITION p202405 VALUES LESS THAN ('2024-06-01'),
+    PARTITION p202406 VALUES LESS THAN ('2024-07-01'),
+    PARTITION p202407 VALUES LESS THAN ('2024-08-01'),
+    PARTITION p202408 VALUES LESS THAN ('2024-09-01'),
+    PARTITION p202409 VALUES LESS THAN ('2024-10-01'),
+    PARTITION p202410 VALUES LESS THAN ('2024-11-01'),
+    PARTITION p202411 VALUES LESS THAN ('2024-12-01'),
+    PARTITION p202412 VALUES LESS THAN ('2025-01-01'),
+    PARTITION pmax VALUES LESS THAN (MAXVALUE)
+);
 
 -- Create user for application
 CREATE USER IF NOT EXISTS 'eemeli'@'localhost' IDENTIFIED BY 'SecurePassword123!';
-GRANT SELECT, INSERT, UPDATE, DELETE ON electric_data.* TO 'eemeli'@'localhost';
+GRANT SELECT, INSERT, UPDATE, DELETE, CREATE, ALTER, DROP ON electric_data.* TO 'eemeli'@'localhost';
 FLUSH PRIVILEGES;
 
 -- Create a view for easy data access
 CREATE OR REPLACE VIEW price_summary AS
 SELECT 
-    DATE_FORMAT(date, '%Y-%m') as month,
+    area,
+    DATE_FORMAT(ts, '%Y-%m') as month,
     COUNT(*) as records,
     AVG(price_eur_mwh) as avg_price,
     MIN(price_eur_mwh) as min_price,
     MAX(price_eur_mwh) as max_price,
     STDDEV(price_eur_mwh) as std_price
 FROM electric_prices 
-GROUP BY DATE_FORMAT(date, '%Y-%m')
-ORDER BY month DESC;
+GROUP BY area, DATE_FORMAT(ts, '%Y-%m')
+ORDER BY area, month DESC;
 
 -- Insert sample data if table is empty
-INSERT IGNORE INTO electric_prices (date, price_eur_mwh, area) VALUES
-('2024-01-01', 65.50, 'Finland'),
-('2024-01-02', 72.30, 'Finland'),
-('2024-01-03', 58.90, 'Finland'),
-('2024-01-04', 81.20, 'Finland'),
-('2024-01-05', 69.75, 'Finland'),
-('2024-01-06', 55.40, 'Finland'),
-('2024-01-07', 62.10, 'Finland'),
-('2024-01-08', 78.65, 'Finland'),
-('2024-01-09', 71.25, 'Finland'),
-('2024-01-10', 66.80, 'Finland');
+INSERT IGNORE INTO electric_prices (ts, price_eur_mwh, area) VALUES
+('2024-01-01 00:00:00', 65.50, 'Finland'),
+('2024-01-02 00:00:00', 72.30, 'Finland'),
+('2024-01-03 00:00:00', 58.90, 'Finland'),
+('2024-01-04 00:00:00', 81.20, 'Finland'),
+('2024-01-05 00:00:00', 69.75, 'Finland'),
+('2024-01-06 00:00:00', 55.40, 'Finland'),
+('2024-01-07 00:00:00', 62.10, 'Finland'),
+('2024-01-08 00:00:00', 78.65, 'Finland'),
+('2024-01-09 00:00:00', 71.25, 'Finland'),
+('2024-01-10 00:00:00', 66.80, 'Finland');
 
 -- Show table structure
 DESCRIBE electric_prices;
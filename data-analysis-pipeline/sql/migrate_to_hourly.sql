@@ -0,0 +1,60 @@
+-- Migrate the daily electric_prices table to the hourly partitioned schema
+-- Eemeli Karjalainen - eekarjal24@students.oamk.fi
+-- OAMK - Cloud Services Assignment
+--
+-- Equivalent to DataProcessor.migrate_legacy_table(), which also sizes the
+-- monthly partitions to the data automatically. Run this script once, then
+-- keep electric_prices_legacy until the new table has been verified.
+
+USE electric_data;
+
+-- Build the partitioned table under a temporary name (same definition as
+-- init_database.sql), so electric_prices stays in place if anything fails
+CREATE TABLE IF NOT EXISTS electric_prices_migrating (
+    ts DATETIME NOT NULL,
+    area VARCHAR(50) NOT NULL DEFAULT 'Finland',
+    price_eur_mwh DECIMAL(10,2) NOT NULL,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (ts, area),
+    INDEX idx_area_ts_price (area, ts, price_eur_mwh)
+) ENGINE=InnoDB
+PARTITION BY RANGE COLUMNS (ts) (
+    PARTITION p_before VALUES LESS THAN ('2024-01-01'),
+    PARTITION p202401 VALUES LESS THAN ('2024-02-01'),
+    PARTITION p202402 VALUES LESS THAN ('2024-03-01'),
+    PARTITION p202403 VALUES LESS THAN ('2024-04-01'),
+    PARTITION p202404 VALUES LESS THAN ('2024-05-01'),
+    PARTITION p202405 VALUES LESS THAN ('2024-06-01'),
+    PARTITION p202406 VALUES LESS THAN ('2024-07-01'),
+    PARTITION p202407 VALUES LESS THAN ('2024-08-01'),
+    PARTITION p202408 VALUES LESS THAN ('2024-09-01'),
+    PARTITION p202409 VALUES LESS THAN ('2024-10-01'),
+    PARTITION p202410 VALUES LESS THAN ('2024-11-01'),
+    PARTITION p202411 VALUES LESS THAN ('2024-12-01'),
+    PARTITION p202412 VALUES LESS THAN ('2025-01-01'),
+    PARTITION pmax VALUES LESS THAN (MAXVALUE)
+);
+
+-- Daily prices become midnight timestamps
+INSERT INTO electric_prices_migrating (ts, area, price_eur_mwh, timestamp)
+SELECT CAST(date AS DATETIME), COALESCE(area, 'Finland'), price_eur_mwh, timestamp
+FROM electric_prices
+ON DUPLICATE KEY UPDATE price_eur_mwh = VALUES(price_eur_mwh);
+
+-- Swap both tables in one atomic step, keeping the old one as electric_prices_legacy
+RENAME TABLE electric_prices TO electric_prices_legacy,
+             electric_prices_migrating TO electric_prices;
+
+-- Verify row counts match
+SELECT
+    (SELECT COUNT(*) FROM electric_prices_legacy) AS legacy_rows,
+    (SELECT COUNT(*) FROM electric_prices) AS migrated_rows;
+
+-- Archiving an old month (metadata-only, no row copies):
+--   CREATE TABLE electric_prices_archive_202401 LIKE electric_prices;
+--   ALTER TABLE electric_prices_archive_202401 REMOVE PARTITIONING;
+--   ALTER TABLE electric_prices EXCHANGE PARTITION p202401 WITH TABLE electric_prices_archive_202401;
+--   ALTER TABLE electric_prices DROP PARTITION p202401;
+
+-- Once verified:
+--   DROP TABLE electric_prices_legacy;
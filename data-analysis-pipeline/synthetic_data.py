@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+
+# Nordic bidding zones with a rough base price (EUR/MWh) and volatility
+NORDIC_ZONES = {
+    'FI': (65.0, 18.0),
+    'SE1': (40.0, 12.0),
+    'SE2': (42.0, 12.0),
+    'SE3': (60.0, 20.0),
+    'SE4': (75.0, 25.0),
+    'NO1': (55.0, 15.0),
+    'NO2': (58.0, 16.0),
+    'NO3': (38.0, 10.0),
+    'NO4': (30.0, 9.0),
+    'NO5': (52.0, 14.0),
+    'DK1': (80.0, 26.0),
+    'DK2': (82.0, 26.0),
+    'EE': (85.0, 28.0)
+}
+
+# Market time units, coarsest first, tried by fit_freq()
+FREQUENCIES = ['h', '30min', '15min', '5min', 'min']
+# Longest span write_synthetic_csv() generates; each month becomes a partition on ingest
+MAX_SPAN_YEARS = 3
+
+# Relative price level per hour of day: night trough, morning and evening peaks
+HOURLY_PROFILE = np.array([
+    0.80, 0.76, 0.74, 0.73, 0.75, 0.82, 0.95, 1.10, 1.18, 1.12, 1.05, 1.00,
+    0.97, 0.95, 0.96, 1.00, 1.08, 1.20, 1.25, 1.18, 1.08, 0.98, 0.90, 0.84
+])
+
+
+def freq_step(freq):
+    """Length of one period for a pandas frequency string such as 'h', '15min' or 'D'"""
+    return pd.Timedelta(freq if freq[0].isdigit() else f"1{freq}")
+
+
+def generate_prices(start, periods, areas=None, freq='h', spike_probability=0.002, seed=None, rng=None):
+    """Generate `periods` timestamps of prices for every area, fully vectorized.
+
+    Prices combine a per-area base level, winter-high annual seasonality, an
+    intraday profile, lower weekend prices, Gaussian noise and rare spikes
+    (occasionally negative). Rows are ordered by timestamp, then area.
+    """
+    areas = list(areas or NORDIC_ZONES)
+    rng = rng or np.random.default_rng(seed)
+    step = freq_step(freq).to_timedelta64()
+    ts = np.datetime64(pd.Timestamp(start).to_datetime64(), 's') + np.arange(periods) * step
+
+    day_of_year = (ts.astype('datetime64[D]') - ts.astype('datetime64[Y]')).astype(np.int64)
+    hour = (ts.astype('datetime64[h]') - ts.astype('datetime64[D]')).astype(np.int64)
+    # 1970-01-01 was a Thursday; 0 = Monday
+    weekday = (ts.astype('datetime64[D]').astype(np.int64) + 3) % 7
+
+    seasonal = 1.0 + 0.3 * np.cos(2 * np.pi * (day_of_year - 15) / 365.25)
+    weekly = np.where(weekday >= 5, 0.85, 1.0)
+    # Daily (or coarser) rows get the day's average level, not the midnight hour's
+    intraday = HOURLY_PROFILE[hour] if step < np.timedelta64(1, 'D') else HOURLY_PROFILE.mean()
+    shape = seasonal * intraday * weekly
+
+    default = (60.0, 15.0)
+    base = np.array([NORDIC_ZONES.get(area, default)[0] for area in areas])
+    volatility = np.array([NORDIC_ZONES.get(area, default)[1] for area in areas])
+
+    # (periods, areas) matrix, flattened row-major => ordered by ts then area
+    prices = shape[:, None] * base[None, :]
+    prices += rng.normal(0.0, 1.0, prices.shape) * volatility[None, :]
+    spikes = rng.random(prices.shape) < spike_probability
+    prices[spikes] += rng.exponential(150.0, spikes.sum())
+    dips = rng.random(prices.shape) < spike_probability / 4
+    prices[dips] = -rng.exponential(10.0, dips.sum())
+
+    return pd.DataFrame({
+        'ts': np.repeat(ts, len(areas)),
+        'area': np.tile(np.array(areas, dtype=object), periods),
+        'price_eur_mwh': np.round(prices.ravel(), 2)
+    })
+
+
+def fit_freq(rows, areas=None, years=MAX_SPAN_YEARS):
+    """Coarsest frequency in FREQUENCIES that fits `rows` rows over all areas into `years` years"""
+    periods = -(-rows // len(list(areas or NORDIC_ZONES)))
+    limit = pd.Timedelta(days=365 * years)
+    for freq in FREQUENCIES:
+        if periods * freq_step(freq) <= limit:
+            return freq
+    return FREQUENCIES[-1]
+
+
+def write_synthetic_csv(path, rows, start='2020-01-01', areas=None, freq=None, chunk_rows=1_000_000, seed=None,
+                        max_years=MAX_SPAN_YEARS):
+    """Stream roughly `rows` rows of synthetic prices to a CSV file in chunks.
+
+    Without `freq`, the coarsest resolution that keeps the data within
+    `max_years` is used; an explicit `freq` that would exceed it raises
+    ValueError (10^7 hourly rows over 13 zones would reach the year 2107).
+    Only one chunk is held in memory at a time. Returns the number of rows written.
+    """
+    areas = list(areas or NORDIC_ZONES)
+    freq = freq or fit_freq(rows, areas, max_years)
+    total_periods = max(1, -(-rows // len(areas)))
+    chunk_periods = max(1, chunk_rows // len(areas))
+    step = freq_step(freq)
+    if total_periods * step > pd.Timedelta(days=365 * max_years):
+        raise ValueError(f"{rows:,} rows at '{freq}' over {len(areas)} areas span more than {max_years} years; "
+                         f"use a finer freq, more areas or a larger max_years")
+    rng = np.random.default_rng(seed)
+
+    written = 0
+    with open(path, 'w', newline='') as f:
+        for offset in range(0, total_periods, chunk_periods):
+            periods = min(chunk_periods, total_periods - offset)
+            chunk = generate_prices(pd.Timestamp(start) + offset * step, periods, areas, freq, rng=rng)
+            chunk.to_csv(f, header=(offset == 0), index=False, date_format='%Y-%m-%d %H:%M:%S')
+            written += len(chunk)
+    return written
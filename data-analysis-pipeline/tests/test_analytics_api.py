@@ -0,0 +1,82 @@
+from datetime import datetime
+
+import pytest
+
+import analytics_api
+import config
+
+
+class FakeQueries:
+    """Answers analytics_api.query() and records every statement"""
+
+    def __init__(self):
+        self.version = 1
+        self.last_ts = datetime(2024, 6, 30, 23)
+        self.statements = []
+
+    def __call__(self, sql, params=()):
+        sql = ' '.join(sql.split())
+        self.statements.append((sql, list(params)))
+        if 'AS version' in sql:
+            return [{'version': self.version}]
+        if sql.startswith('SELECT MAX(ts) AS last_ts'):
+            return [{'last_ts': self.last_ts}]
+        return []
+
+    def aggregate_params(self):
+        return [params for sql, params in self.statements if 'GROUP BY' in sql]
+
+
+@pytest.fixture
+def queries(monkeypatch):
+    queries = FakeQueries()
+    monkeypatch.setattr(analytics_api, 'query', queries)
+    monkeypatch.setattr(analytics_api, 'cache', analytics_api.ResponseCache(16, 600, 0))
+    return queries
+
+
+@pytest.fixture
+def client(queries):
+    return analytics_api.app.test_client()
+
+
+def test_version_only_counts_runs_that_changed_rows(client, queries):
+    client.get('/api/summary')
+
+    version_sql = next(sql for sql, _ in queries.statements if 'AS version' in sql)
+    assert 'changed_from IS NOT NULL' in version_sql
+
+
+def test_cache_survives_runs_that_changed_nothing(client, queries):
+    first = client.get('/api/rollup')
+    assert client.get('/api/rollup').headers['X-Cache'] == 'HIT'
+
+    queries.version = 2
+    second = client.get('/api/rollup')
+    assert second.headers['X-Cache'] == 'MISS'
+    assert second.headers['ETag'] != first.headers['ETag']
+
+
+@pytest.mark.parametrize('path', ['/api/rollup', '/api/summary'])
+def test_unfiltered_aggregates_default_to_recent_data(client, queries, path):
+    body = client.get(path).get_json()
+
+    days = config.API_CONFIG['default_range_days']
+    expected_start = queries.last_ts - analytics_api.timedelta(days=days)
+    assert queries.aggregate_params() == [[expected_start]]
+    assert body['start'] == expected_start.isoformat()
+    assert body['end'] == queries.last_ts.isoformat()
+
+
+def test_default_range_ends_at_the_requested_end(client, queries):
+    body = client.get('/api/summary?end=2024-03-31&area=FI').get_json()
+
+    assert queries.aggregate_params() == [[datetime(2024, 1, 2), datetime(2024, 4, 1), 'FI']]
+    assert body['start'] == '2024-01-02T00:00:00'
+    assert not any(sql.startswith('SELECT MAX(ts)') for sql, _ in queries.statements)
+
+
+def test_explicit_start_is_kept(client, queries):
+    client.get('/api/rollup?period=month&start=2020-01-01')
+
+    assert queries.aggregate_params() == [[datetime(2020, 1, 1)]]
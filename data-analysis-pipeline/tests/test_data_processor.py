@@ -0,0 +1,120 @@
+import re
+
+import pytest
+
+from data_processor import DataProcessor
+
+
+class FakePartitionedDatabase:
+    """electric_prices partitions and archive tables, as seen by archive_partitions()"""
+
+    def __init__(self, partitions):
+        # {partition name: row count}, in order; pmax is always last
+        self.partitions = dict(partitions)
+        # {archive table: {'partitioned': bool, 'rows': int}}
+        self.tables = {}
+        self.fail_on = None
+        self.statements = []
+
+
+class FakeCursor:
+    BOUNDS = {'p202401': "'2024-02-01'", 'p202402': "'2024-03-01'", 'p202403': "'2024-04-01'"}
+
+    def __init__(self, db):
+        self.db = db
+        self._rows = []
+
+    def execute(self, sql, params=()):
+        sql = ' '.join(sql.split())
+        db = self.db
+        db.statements.append(sql)
+        if db.fail_on and db.fail_on in sql:
+            db.fail_on = None
+            raise FakeError("Lock wait timeout exceeded")
+        self._rows = []
+        if 'information_schema.PARTITIONS' in sql:
+            table = params[0]
+            if table == 'electric_prices':
+                self._rows = [(name, self.BOUNDS.get(name, 'MAXVALUE')) for name in db.partitions]
+            elif db.tables.get(table, {}).get('partitioned'):
+                self._rows = [(name, self.BOUNDS.get(name, 'MAXVALUE')) for name in self.BOUNDS] + [('pmax', 'MAXVALUE')]
+            else:
+                self._rows = [(None, None)] if table in db.tables else []
+        elif match := re.match(r'CREATE TABLE IF NOT EXISTS (\w+) LIKE electric_prices', sql):
+            db.tables.setdefault(match.group(1), {'partitioned': True, 'rows': 0})
+        elif match := re.match(r'ALTER TABLE (\w+) REMOVE PARTITIONING', sql):
+            table = db.tables[match.group(1)]
+            if not table['partitioned']:
+                raise FakeError("1505: Partition management on a not partitioned table is not possible")
+            table['partitioned'] = False
+        elif match := re.match(r'SELECT EXISTS \(SELECT 1 FROM electric_prices PARTITION \((\w+)\)\)', sql):
+            self._rows = [(int(db.partitions[match.group(1)] > 0),)]
+        elif match := re.match(r'SELECT EXISTS \(SELECT 1 FROM (\w+)\)', sql):
+            self._rows = [(int(db.tables[match.group(1)]['rows'] > 0),)]
+        elif match := re.match(r'ALTER TABLE electric_prices EXCHANGE PARTITION (\w+) WITH TABLE (\w+)', sql):
+            name, table = match.groups()
+            db.partitions[name], db.tables[table]['rows'] = db.tables[table]['rows'], db.partitions[name]
+        elif match := re.match(r'ALTER TABLE electric_prices DROP PARTITION (\w+)', sql):
+            del db.partitions[match.group(1)]
+        else:
+            raise AssertionError(f"Unexpected SQL: {sql}")
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+
+class FakeError(Exception):
+    pass
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self.db)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def processor(monkeypatch):
+    import data_processor
+    # archive_partitions() catches mysql.connector.Error
+    monkeypatch.setattr(data_processor, 'Error', FakeError)
+    processor = DataProcessor()
+    processor.db = FakePartitionedDatabase([('p202401', 10), ('p202402', 20), ('p202403', 30), ('pmax', 0)])
+    processor.connect_database = lambda: FakeConnection(processor.db)
+    return processor
+
+
+def test_archive_moves_old_months_out(processor):
+    archived = processor.archive_partitions('2024-03-01')
+
+    assert archived == ['electric_prices_archive_202401', 'electric_prices_archive_202402']
+    assert list(processor.db.partitions) == ['p202403', 'pmax']
+    assert processor.db.tables['electric_prices_archive_202401'] == {'partitioned': False, 'rows': 10}
+
+
+@pytest.mark.parametrize('fail_on', ['EXCHANGE PARTITION p202401', 'DROP PARTITION p202401'])
+def test_archive_can_be_retried_after_a_failure(processor, fail_on):
+    processor.db.fail_on = fail_on
+    assert processor.archive_partitions('2024-02-01') == []
+
+    assert processor.archive_partitions('2024-02-01') == ['electric_prices_archive_202401']
+    assert list(processor.db.partitions) == ['p202402', 'p202403', 'pmax']
+    assert processor.db.tables['electric_prices_archive_202401']['rows'] == 10
+
+
+def test_archive_refuses_to_exchange_into_a_non_empty_table(processor):
+    processor.db.tables['electric_prices_archive_202401'] = {'partitioned': False, 'rows': 5}
+
+    assert processor.archive_partitions('2024-02-01') == []
+    assert processor.db.partitions['p202401'] == 10
+    assert processor.db.tables['electric_prices_archive_202401']['rows'] == 5
+    assert not any('EXCHANGE' in sql for sql in processor.db.statements)
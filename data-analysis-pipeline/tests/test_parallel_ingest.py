@@ -0,0 +1,94 @@
+import os
+import pstats
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import config
+from instrumentation import PipelineRun
+from parallel_ingest import ParallelIngestor, parse_file
+
+
+def crashing_parse(path, known_checksum=None, profile=False):
+    """parse_file(), but the worker process dies on files named crash*.csv"""
+    if os.path.basename(path).startswith('crash'):
+        os._exit(1)
+    return parse_file(path, known_checksum, profile)
+
+
+class OfflineIngestor(ParallelIngestor):
+    """ParallelIngestor with the manifest and database writes kept in memory"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.manifest = {}
+        self.written = []
+
+    def create_manifest_table(self):
+        return True
+
+    def load_manifest(self):
+        return {}
+
+    def record_manifest(self, path, checksum, status, attempts, raw_rows=0, row_count=0, error=None):
+        self.manifest[path] = (status, attempts)
+
+    def write_file(self, parsed):
+        self.written.append(parsed['path'])
+        parsed['changed'] = {}
+        return parsed
+
+
+def write_feed(path, seed):
+    timestamps = pd.date_range('2024-01-01', periods=200, freq='h')
+    prices = np.random.default_rng(seed).normal(60, 15, len(timestamps)).round(2)
+    pd.DataFrame({'timestamp': timestamps, 'price_eur_mwh': prices, 'area': 'FI'}).to_csv(path, index=False)
+
+
+@pytest.fixture
+def feeds(tmp_path):
+    for seed, name in enumerate(['a', 'b', 'crash', 'c', 'd', 'e']):
+        write_feed(tmp_path / f'{name}.csv', seed)
+    return tmp_path
+
+
+def test_dead_parser_only_fails_its_own_file(feeds):
+    ingestor = OfflineIngestor(parse_workers=2, max_writers=1, max_retries=1)
+    ingestor.parse_func = crashing_parse
+
+    summary = ingestor.run(str(feeds / '*.csv'))
+
+    crashed = str(feeds / 'crash.csv')
+    assert list(summary['failed']) == [crashed]
+    assert sorted(os.path.basename(path) for path in summary['ingested']) == \
+        ['a.csv', 'b.csv', 'c.csv', 'd.csv', 'e.csv']
+    # Collateral failures from the broken pool don't use up retries
+    assert all(attempts == 1 for path, (status, attempts) in ingestor.manifest.items() if path != crashed)
+    assert ingestor.manifest[crashed] == ('failed', 2)
+
+
+def test_manifest_keys_are_absolute(feeds, monkeypatch):
+    monkeypatch.chdir(feeds.parent)
+    ingestor = OfflineIngestor(parse_workers=1, max_writers=1)
+
+    summary = ingestor.run(os.path.join(feeds.name, 'a.csv'))
+
+    assert summary['ingested'] == [str(feeds / 'a.csv')]
+    assert list(ingestor.manifest) == [str(feeds / 'a.csv')]
+
+
+def test_profile_covers_parser_processes_and_writer_threads(feeds, tmp_path, monkeypatch):
+    monkeypatch.setitem(config.PIPELINE_CONFIG, 'profile_dir', str(tmp_path / 'profiles'))
+    run = PipelineRun('feeds', profile=True)
+    ingestor = OfflineIngestor(parse_workers=2, max_writers=2, run=run)
+
+    summary = ingestor.run(str(feeds / '[a-e].csv'))
+    run.finish(True)
+
+    assert len(summary['ingested']) == 5
+    assert summary['worker_peak_rss_mb'] > 0
+    functions = {name for _, _, name in pstats.Stats(run.profile_path).stats}
+    # clean_data only runs in the parser processes, write_file only on writer threads
+    assert 'clean_data' in functions
+    assert 'write_file' in functions
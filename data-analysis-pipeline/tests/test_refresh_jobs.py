@@ -0,0 +1,72 @@
+from datetime import datetime
+
+import pytest
+
+import refresh_jobs
+from instrumentation import PipelineRun
+from refresh_jobs import RefreshJobRunner
+
+
+class FakeProcessor:
+    """Stands in for DataProcessor; `changed` and `success` set what the run did"""
+    changed = {}
+    success = True
+
+    def __init__(self, source=None):
+        self.progress_callback = None
+        self.last_run = None
+
+    def connect_database(self):
+        # No database: _acquire_db_lock() lets the pipeline run
+        return None
+
+    def process_electric_prices(self):
+        self.last_run = PipelineRun('test.csv')
+        self.last_run.changed = dict(self.changed)
+        return self.success
+
+
+@pytest.fixture
+def runner(monkeypatch):
+    monkeypatch.setattr(refresh_jobs, 'DataProcessor', FakeProcessor)
+    runner = RefreshJobRunner('test.csv')
+    runner.completed = []
+    runner.on_complete(runner.completed.append)
+    return runner
+
+
+def refresh(runner):
+    job = runner.submit()
+    assert job.wait(5)
+    return job
+
+
+@pytest.mark.parametrize('success', [True, False])
+def test_refresh_that_wrote_rows_invalidates(runner, monkeypatch, success):
+    monkeypatch.setattr(FakeProcessor, 'changed', {'FI': datetime(2024, 1, 1)})
+    monkeypatch.setattr(FakeProcessor, 'success', success)
+
+    job = refresh(runner)
+
+    assert job.status == ('success' if success else 'failed')
+    assert runner.data_version == 1
+    assert runner.completed == [job]
+
+
+def test_refresh_without_changes_keeps_the_version(runner):
+    job = refresh(runner)
+
+    assert job.status == 'success'
+    assert runner.data_version == 0
+    assert runner.completed == []
+
+
+def test_lock_contention_is_skipped_not_failed(runner, monkeypatch):
+    monkeypatch.setattr(runner, '_acquire_db_lock', lambda processor: (False, None))
+
+    job = refresh(runner)
+
+    assert job.status == 'skipped'
+    assert job.error is None
+    assert not job.is_active
+    assert runner.data_version == 0
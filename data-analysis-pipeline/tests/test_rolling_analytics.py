@@ -0,0 +1,296 @@
+import copy
+import re
+from datetime import datetime
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import config
+from data_processor import DataProcessor
+from instrumentation import PipelineRun
+from rolling_analytics import RollingAnalytics, RollingState, extend
+
+METRICS_TABLE = config.ROLLING_CONFIG['metrics_table']
+STATE_TABLE = config.ROLLING_CONFIG['state_table']
+
+
+def make_prices(rows=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    prices = np.round(60 + rng.normal(0, 15, rows) + (rng.random(rows) < 0.01) * 300, 2)
+    timestamps = pd.date_range('2024-01-01', periods=rows, freq='h')
+    return prices, timestamps
+
+
+class FakeDatabase:
+    """In-memory stand-in for the tables RollingAnalytics touches"""
+
+    def __init__(self):
+        self.prices = {}
+        self.metrics = {}
+        self.state = {}
+        self.metric_rows_written = 0
+        self._snapshot = None
+
+    def add_prices(self, area, timestamps, prices):
+        series = self.prices.setdefault(area, {})
+        for ts, price in zip(timestamps, prices):
+            series[pd.Timestamp(ts).to_pydatetime()] = Decimal(f"{price:.2f}")
+
+    def stored_metrics(self, area):
+        rows = [dict(row, ts=ts) for ts, row in sorted(self.metrics.get(area, {}).items())]
+        return pd.DataFrame(rows)
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self.rowcount = 0
+        self._rows = []
+
+    def execute(self, sql, params=()):
+        sql = ' '.join(sql.split())
+        db = self.db
+        self.rowcount = 0
+        self._rows = []
+        if sql.startswith('CREATE TABLE'):
+            return
+        if sql.startswith(f'SELECT last_ts, tail, ewma, row_count, params FROM {STATE_TABLE}'):
+            row = db.state.get(params[0])
+            self._rows = [row[1:]] if row else []
+        elif sql.startswith(f'INSERT INTO {STATE_TABLE}'):
+            db.state[params[0]] = tuple(params)
+        elif sql.startswith(f'DELETE FROM {METRICS_TABLE} WHERE area = %s AND ts >= %s'):
+            area, since = params
+            doomed = [ts for ts in db.metrics.get(area, {}) if ts >= since]
+            for ts in doomed:
+                del db.metrics[area][ts]
+            self.rowcount = len(doomed)
+        elif sql.startswith(f'DELETE FROM {METRICS_TABLE} WHERE area = %s'):
+            self.rowcount = len(db.metrics.pop(params[0], {}))
+        elif sql.startswith(f'SELECT ts, price_eur_mwh, ewma FROM {METRICS_TABLE}'):
+            area, before, limit = params
+            series = db.metrics.get(area, {})
+            keys = sorted(ts for ts in series if ts < before)[-limit:][::-1]
+            self._rows = [(ts, series[ts]['price_eur_mwh'], series[ts]['ewma']) for ts in keys]
+        elif sql.startswith('SELECT ts, price_eur_mwh FROM electric_prices WHERE area = %s'):
+            area = params[0]
+            after = params[1] if len(params) > 1 else None
+            series = db.prices.get(area, {})
+            self._rows = [(ts, series[ts]) for ts in sorted(series) if after is None or ts > after]
+        elif sql.startswith('SELECT DISTINCT area FROM electric_prices'):
+            self._rows = [(area,) for area in sorted(db.prices)]
+        else:
+            raise AssertionError(f"Unexpected SQL: {sql}")
+
+    def executemany(self, sql, rows):
+        sql = ' '.join(sql.split())
+        assert sql.startswith(f'INSERT INTO {METRICS_TABLE}')
+        columns = [c.strip() for c in re.search(r'\(([^)]*)\)', sql).group(1).split(',')]
+        for row in rows:
+            values = dict(zip(columns, row))
+            area, ts = values.pop('area'), values.pop('ts')
+            # DECIMAL(10,2) column
+            values['price_eur_mwh'] = Decimal(f"{values['price_eur_mwh']:.2f}")
+            self.db.metrics.setdefault(area, {})[ts] = values
+        self.db.metric_rows_written += len(rows)
+        self.rowcount = len(rows)
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def fetchmany(self, size):
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self.db)
+
+    def start_transaction(self):
+        self.db._snapshot = copy.deepcopy((self.db.metrics, self.db.state))
+
+    def commit(self):
+        self.db._snapshot = None
+
+    def rollback(self):
+        self.db.metrics, self.db.state = self.db._snapshot
+        self.db._snapshot = None
+
+    def close(self):
+        pass
+
+
+class FakeProcessor(DataProcessor):
+    def __init__(self, db):
+        super().__init__()
+        self.db = db
+
+    def connect_database(self):
+        return FakeConnection(self.db)
+
+
+@pytest.fixture
+def db():
+    return FakeDatabase()
+
+
+@pytest.fixture
+def analytics(db, monkeypatch):
+    # Several fetchmany() chunks per area
+    monkeypatch.setitem(config.ROLLING_CONFIG, 'chunk_rows', 700)
+    return RollingAnalytics(FakeProcessor(db))
+
+
+def assert_metrics_match(stored, expected, columns):
+    assert len(stored) == len(expected)
+    assert list(stored['ts']) == list(expected['ts'].dt.to_pydatetime())
+    for column in columns:
+        np.testing.assert_allclose(stored[column].astype(float), expected[column].astype(float),
+                                   rtol=1e-9, atol=1e-9, equal_nan=True)
+    assert list(stored['is_spike'].astype(bool)) == list(expected['is_spike'])
+
+
+def test_chunked_extend_matches_full_recompute():
+    prices, timestamps = make_prices()
+    full, full_state = extend(prices, timestamps, RollingState('TEST'))
+
+    rng = np.random.default_rng(1)
+    bounds = np.sort(rng.choice(np.arange(1, len(prices)), 6, replace=False))
+    state, parts = RollingState('TEST'), []
+    for start, end in zip(np.r_[0, bounds], np.r_[bounds, len(prices)]):
+        part, state = extend(prices[start:end], timestamps[start:end], state)
+        parts.append(part)
+
+    pd.testing.assert_frame_equal(full, pd.concat(parts, ignore_index=True),
+                                  check_exact=False, rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(full_state.tail, state.tail)
+    assert full_state.ewma == pytest.approx(state.ewma, rel=1e-12)
+    assert full_state.row_count == state.row_count == len(prices)
+
+
+def test_extend_matches_pandas_definitions():
+    prices, timestamps = make_prices(2000)
+    metrics, _ = extend(prices, timestamps, RollingState('TEST'))
+
+    expected_ewma = pd.Series(prices).ewm(span=config.ROLLING_CONFIG['ewma_span'], adjust=False).mean()
+    np.testing.assert_allclose(metrics['ewma'], expected_ewma)
+    for window in config.ROLLING_CONFIG['windows']:
+        rolling = pd.Series(prices).rolling(window)
+        np.testing.assert_allclose(metrics[f'mean_{window}'], rolling.mean(), equal_nan=True)
+        np.testing.assert_allclose(metrics[f'std_{window}'], rolling.std(), equal_nan=True)
+
+
+def test_extend_accepts_series_timestamps():
+    """update_area() passes pd.to_datetime(chunk['ts']), a Series with its own index"""
+    prices, timestamps = make_prices(1000)
+    rows = list(zip(timestamps.to_pydatetime(), prices))
+    chunk = pd.DataFrame(rows[400:], columns=['ts', 'price_eur_mwh'], index=range(400, 1000))
+    _, state = extend(prices[:400], pd.to_datetime(pd.DataFrame(rows[:400], columns=['ts', 'p'])['ts']),
+                      RollingState('TEST'))
+
+    metrics, state = extend(chunk['price_eur_mwh'].to_numpy(), pd.to_datetime(chunk['ts']), state)
+
+    assert type(state.last_ts) is datetime
+    assert state.last_ts == timestamps[-1].to_pydatetime()
+    assert list(metrics.index) == list(range(600))
+    assert list(metrics['ts']) == list(timestamps[400:])
+
+
+def test_state_round_trips_through_the_state_table(db, analytics):
+    prices, timestamps = make_prices(500)
+    _, state = extend(prices, timestamps, RollingState('FI'))
+    cursor = FakeCursor(db)
+
+    analytics.save_state(cursor, state)
+    loaded = analytics.load_state(cursor, 'FI')
+
+    assert loaded.last_ts == state.last_ts
+    np.testing.assert_allclose(loaded.tail, state.tail)
+    assert loaded.ewma == state.ewma
+    assert loaded.row_count == state.row_count
+    assert loaded.params == state.params == analytics.params
+
+    more_prices, more_timestamps = make_prices(600, seed=3)
+    more_timestamps = more_timestamps + pd.Timedelta(hours=500)
+    expected, _ = extend(more_prices, more_timestamps, state)
+    actual, _ = extend(more_prices, more_timestamps, loaded)
+    pd.testing.assert_frame_equal(expected, actual)
+
+
+def test_update_extends_with_new_rows_only(db, analytics):
+    prices, timestamps = make_prices(3000)
+    db.add_prices('FI', timestamps[:2000], prices[:2000])
+    assert analytics.update({'FI': timestamps[0]}) == 2000
+
+    db.add_prices('FI', timestamps[2000:], prices[2000:])
+    db.metric_rows_written = 0
+    assert analytics.update({'FI': timestamps[2000]}) == 1000
+    assert db.metric_rows_written == 1000
+
+    expected, _ = extend(prices, timestamps, RollingState('FI'))
+    assert_metrics_match(db.stored_metrics('FI'), expected, analytics.metric_columns)
+    assert db.state['FI'][4] == 3000
+
+
+def test_changed_rows_recompute_from_the_change_only(db, analytics):
+    prices, timestamps = make_prices(3000)
+    db.add_prices('FI', timestamps, prices)
+    analytics.update()
+
+    changed = prices.copy()
+    changed[2500:2510] += 200
+    db.add_prices('FI', timestamps[2500:2510], changed[2500:2510])
+    db.metric_rows_written = 0
+    assert analytics.update({'FI': timestamps[2500]}) == 500
+    assert db.metric_rows_written == 500
+
+    expected, _ = extend(changed, timestamps, RollingState('FI'))
+    assert_metrics_match(db.stored_metrics('FI'), expected, analytics.metric_columns)
+    assert db.state['FI'][4] == 3000
+
+
+def test_unchanged_ingest_writes_nothing(db, analytics):
+    prices, timestamps = make_prices(1000)
+    db.add_prices('FI', timestamps, prices)
+    analytics.update()
+
+    db.metric_rows_written = 0
+    assert analytics.update({}) == 0
+    assert db.metric_rows_written == 0
+
+
+def test_failed_rebuild_keeps_the_previous_series(db, analytics, monkeypatch):
+    prices, timestamps = make_prices(1000)
+    db.add_prices('FI', timestamps, prices)
+    analytics.update()
+    before = copy.deepcopy((db.metrics, db.state))
+
+    def broken_write(*args):
+        raise RuntimeError("write failed")
+
+    monkeypatch.setattr(analytics, 'write_metrics', broken_write)
+    with pytest.raises(RuntimeError):
+        analytics.update_area(FakeConnection(db), 'FI', timestamps[500])
+    assert (db.metrics, db.state) == before
+
+
+def test_rolling_failure_does_not_fail_the_ingest(db, monkeypatch):
+    def broken_update(self, changed=None):
+        raise KeyError(-1)
+
+    monkeypatch.setattr(RollingAnalytics, 'update', broken_update)
+    run = PipelineRun('test.csv')
+
+    assert FakeProcessor(db).update_rolling_analytics(run, {'FI': datetime(2024, 1, 1)}) is False
+    assert run.stages[-1].name == 'rolling_analytics'
+    assert run.stages[-1].ok is False